@@ -0,0 +1,323 @@
+"""Feed and article fixtures for the offline benchmarks, and a local server that replays them.
+
+    python bench/fixtures.py record [--out bench/fixtures/recorded] [--limit 20] [--articles 3]
+    python bench/fixtures.py synthesize [--out /tmp/naijabuzz-fixtures] [--feeds 24] [--entries 10]
+    python bench/fixtures.py serve --fixtures DIR [--hosts 8] [--latency 0.05]
+
+A fixture directory holds feeds/<n>.xml, articles/<n>.html and manifest.json (category and
+source URL of each file). `record` saves the live FEEDS from main.py as they are right now,
+with the article pages of the first entries of each; `synthesize` writes deterministic
+stand-ins for the shapes those feeds actually have: short summaries with media thumbnails,
+summaries with logos before the real image, Blogger-style full posts in <description>,
+plain-text summaries with the HTML in content:encoded, and galleries long enough to push the
+first words across the 2 KB chunk boundary of main.scan_html().
+
+ReplayServer serves a fixture directory over HTTP on one or more loopback addresses (so the
+per-host limits in main.py behave as they do with real publishers), with article links in
+the feeds pointed at itself, ETags for conditional GETs and optional per-request latency.
+Every /img/ URL on it answers with the same generated 1200x800 JPEG.
+"""
+import argparse
+import hashlib
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from email.utils import format_datetime
+from xml.sax.saxutils import escape
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Links in synthesized feeds point here; a replay server substitutes its own address
+FIXTURE_HOST = 'http://fixtures.local'
+
+WORDS = ('Lagos Abuja governor senate naira budget election Super Eagles coach match goal '
+         'league Nollywood actress album fans market prices fuel subsidy police court report '
+         'minister state youths tech startup funding bank CBN policy weekend crowd stadium').split()
+SHAPES = ('thumbnail', 'logo-first', 'full-post', 'content-encoded', 'late-text')
+
+
+def sentence(rng, n=None):
+    words = [rng.choice(WORDS) for _ in range(n or rng.randint(8, 20))]
+    return ' '.join(words).capitalize() + '.'
+
+
+def paragraphs(rng, count):
+    return ''.join(f"<p>{sentence(rng)} {sentence(rng)} &amp; {sentence(rng)}</p>\n" for _ in range(count))
+
+
+def synth_article(rng, title, slug):
+    return (f"<!DOCTYPE html><html><head><title>{escape(title)}</title>"
+            f'<meta property="og:image" content="{FIXTURE_HOST}/img/{slug}-og.jpg">'
+            f'<meta name="description" content="{escape(sentence(rng))}"></head><body>'
+            '<nav><a href="/">Home</a> <a href="/news">News</a></nav>'
+            f"<article><h1>{escape(title)}</h1>{paragraphs(rng, rng.randint(8, 25))}</article>"
+            '<aside><p>Related: subscribe to our newsletter.</p></aside></body></html>')
+
+
+def synth_item(rng, feed, i, shape, published):
+    slug = f"{feed}-{i}"
+    link = f"{FIXTURE_HOST}/a/{slug}"
+    extra = ''
+    if shape == 'thumbnail':
+        summary = f"<p>{sentence(rng)} {sentence(rng)}</p>"
+        extra = f'<media:thumbnail url="{FIXTURE_HOST}/img/{slug}.jpg"/>'
+    elif shape == 'logo-first':
+        summary = (f'<div class="logo"><img src="{FIXTURE_HOST}/static/site-logo.png" alt="logo"></div>'
+                   f'<p>{sentence(rng)}</p><img src="/uploads/{slug}.jpg" width="600"><p>{sentence(rng)}</p>')
+    elif shape == 'full-post':
+        # Blogger embeds the whole post: styles, scripts, dozens of paragraphs, images further down
+        summary = ('<style>.post{font-size:14px}</style><script>var ads = [];</script>'
+                   + paragraphs(rng, rng.randint(20, 60))
+                   + f'<div class="separator"><img src="{FIXTURE_HOST}/img/{slug}-post.jpg"></div>'
+                   + paragraphs(rng, rng.randint(20, 60)))
+    elif shape == 'content-encoded':
+        summary = sentence(rng, 30)
+        content = paragraphs(rng, 8) + f'<img src="{FIXTURE_HOST}/img/{slug}.png">'
+        extra = f"<content:encoded>{escape(content)}</content:encoded>"
+    else:
+        # A gallery before the first words, so the excerpt text straddles the 2 KB scan chunk
+        gallery = ''
+        while len(gallery) < rng.randint(1850, 2000):
+            gallery += (f'<a href="{FIXTURE_HOST}/img/{slug}-{len(gallery)}.jpg">'
+                        f'<img src="{FIXTURE_HOST}/img/{slug}-{len(gallery)}.jpg" width="640" height="360"></a>')
+        summary = gallery + paragraphs(rng, 6)
+    title = sentence(rng, 8)
+    item = (f"<item><title>{escape(title)}</title><link>{link}</link><guid>{link}</guid>"
+            f"<pubDate>{format_datetime(published)}</pubDate>"
+            f"<description>{escape(summary)}</description>{extra}</item>\n")
+    return item, link, synth_article(rng, title, slug)
+
+
+def synthesize(out, feeds=24, entries=10, seed=1):
+    rng = random.Random(seed)
+    for sub in ('feeds', 'articles'):
+        os.makedirs(os.path.join(out, sub), exist_ok=True)
+    now = datetime(2026, 1, 1, 12, tzinfo=timezone.utc)
+    manifest, articles = [], []
+    for n in range(feeds):
+        shape = SHAPES[n % len(SHAPES)]
+        items = ''
+        for i in range(entries):
+            item, link, page = synth_item(rng, n, i, shape, now - timedelta(minutes=37 * i + n))
+            items += item
+            articles.append(save_article(out, len(articles), n, link, page.encode()))
+        body = ('<?xml version="1.0" encoding="UTF-8"?>\n'
+                '<rss version="2.0" xmlns:media="http://search.yahoo.com/mrss/" '
+                'xmlns:content="http://purl.org/rss/1.0/modules/content/"><channel>'
+                f"<title>Fixture feed {n} ({shape})</title><link>{FIXTURE_HOST}/</link>\n{items}</channel></rss>")
+        path = os.path.join('feeds', f"{n}.xml")
+        with open(os.path.join(out, path), 'w', encoding='utf-8') as f:
+            f.write(body)
+        manifest.append({'file': path, 'category': 'Naija News', 'url': f"{FIXTURE_HOST}/feed/{n}", 'shape': shape})
+    write_manifest(out, manifest, articles, source='synthesized')
+    return out
+
+
+def save_article(out, index, feed, url, body):
+    path = os.path.join('articles', f"{index}.html")
+    with open(os.path.join(out, path), 'wb') as f:
+        f.write(body)
+    return {'file': path, 'feed': feed, 'url': url}
+
+
+def record(out, limit=None, per_feed=3):
+    sys.path.insert(0, ROOT)
+    os.environ.setdefault('INIT_DB_ON_STARTUP', '0')
+    import feedparser
+    import requests
+    import main
+    for sub in ('feeds', 'articles'):
+        os.makedirs(os.path.join(out, sub), exist_ok=True)
+    manifest, articles = [], []
+    for cat, url in main.FEEDS[:limit]:
+        try:
+            resp = requests.get(url, headers=main.HTTP_HEADERS, timeout=main.FEED_TIMEOUT)
+            resp.raise_for_status()
+        except Exception as ex:
+            print(f"skip {url}: {ex}")
+            continue
+        # Numbered by position in the manifest, so skipped feeds leave no gaps
+        n = len(manifest)
+        path = os.path.join('feeds', f"{n}.xml")
+        with open(os.path.join(out, path), 'wb') as f:
+            f.write(resp.content)
+        manifest.append({'file': path, 'category': cat, 'url': url})
+        print(f"{len(resp.content) // 1024:>6} KB  {url}")
+        for entry in feedparser.parse(resp.content).entries[:per_feed]:
+            try:
+                page = requests.get(entry.link, headers=main.HTTP_HEADERS, timeout=main.FEED_TIMEOUT)
+                page.raise_for_status()
+            except Exception as ex:
+                print(f"        skip {entry.get('link')}: {ex}")
+                continue
+            articles.append(save_article(out, len(articles), n, entry.link, page.content))
+    write_manifest(out, manifest, articles, source='recorded')
+    return out
+
+
+def write_manifest(out, feeds, articles, source):
+    with open(os.path.join(out, 'manifest.json'), 'w') as f:
+        json.dump({'source': source, 'created': datetime.now(timezone.utc).isoformat(),
+                   'feeds': feeds, 'articles': articles}, f, indent=2)
+
+
+def read_manifest(path, section):
+    with open(os.path.join(path, 'manifest.json')) as f:
+        items = json.load(f).get(section, [])
+    for item in items:
+        with open(os.path.join(path, item['file']), 'rb') as f:
+            yield dict(item, body=f.read())
+
+
+def load(path):
+    """Fixture feeds as dicts: category, url, body (bytes) and whatever else the manifest holds."""
+    return list(read_manifest(path, 'feeds'))
+
+
+class ReplayHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        replay = self.server.replay
+        replay.count(self.path)
+        if replay.latency:
+            time.sleep(replay.latency)
+        kind, _, key = self.path.lstrip('/').partition('/')
+        body = replay.image if kind == 'img' else replay.routes.get((kind, key.split('?')[0]))
+        if body is None:
+            self.send_response(404)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        etag = f'"{hashlib.md5(body).hexdigest()}"'
+        if kind == 'feed' and self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', {'feed': 'application/rss+xml', 'img': 'image/jpeg'}.get(
+            kind, 'text/html; charset=utf-8'))
+        self.send_header('Content-Length', str(len(body)))
+        if kind == 'feed':
+            self.send_header('ETag', etag)
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class ReplayServer:
+    """Serves a fixture directory on `hosts` loopback addresses (127.0.0.1, 127.0.0.2, ...);
+    feed n and its articles live on host n % hosts. feeds holds (category, local feed URL)."""
+
+    def __init__(self, path, hosts=1, latency=0.0):
+        self.latency = latency
+        self.routes = {}
+        self._image = None
+        self.requests = {'feed': 0, 'a': 0, 'img': 0, 'other': 0}
+        self._lock = threading.Lock()
+        self.servers = []
+        for k in range(hosts):
+            try:
+                server = ThreadingHTTPServer((f'127.0.0.{k + 1}', 0), ReplayHandler)
+            except OSError:
+                # Only 127.0.0.1 is routable here (macOS): everything shares one host
+                break
+            server.daemon_threads = True
+            server.replay = self
+            self.servers.append(server)
+        bases = [f"http://{s.server_address[0]}:{s.server_address[1]}" for s in self.servers]
+        articles = list(read_manifest(path, 'articles'))
+        self.feeds = []
+        for n, feed in enumerate(read_manifest(path, 'feeds')):
+            base = bases[n % len(bases)]
+            body = feed['body']
+            for i, article in enumerate(articles):
+                if article['feed'] != n:
+                    continue
+                local = f"{base}/a/{i}".encode()
+                self.routes[('a', str(i))] = article['body'].replace(FIXTURE_HOST.encode(), base.encode())
+                body = body.replace(article['url'].encode(), local)
+                body = body.replace(escape(article['url']).encode(), local)
+            body = body.replace(FIXTURE_HOST.encode(), base.encode())
+            self.routes[('feed', str(n))] = body
+            self.feeds.append((feed['category'], f"{base}/feed/{n}"))
+
+    @property
+    def image(self):
+        # A photo-sized JPEG with some detail in it, so resizing and encoding cost what they do for real
+        if self._image is None:
+            import io
+            from PIL import Image
+            img = Image.radial_gradient('L').resize((1200, 800)).convert('RGB')
+            buf = io.BytesIO()
+            img.save(buf, 'JPEG', quality=85)
+            self._image = buf.getvalue()
+        return self._image
+
+    def count(self, path):
+        kind = path.lstrip('/').split('/')[0]
+        with self._lock:
+            self.requests[kind if kind in self.requests else 'other'] += 1
+
+    def start(self):
+        for server in self.servers:
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        for server in self.servers:
+            server.shutdown()
+            server.server_close()
+
+
+def ensure(path=None, **synth_args):
+    """The given fixture directory, or a freshly synthesized one when none is given."""
+    if path:
+        return path
+    return synthesize(tempfile.mkdtemp(prefix='naijabuzz-fixtures-'), **synth_args)
+
+
+def run():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    sub = parser.add_subparsers(dest='command', required=True)
+    rec = sub.add_parser('record', help='save the live FEEDS as fixtures')
+    rec.add_argument('--out', default=os.path.join(ROOT, 'bench', 'fixtures', 'recorded'))
+    rec.add_argument('--limit', type=int)
+    rec.add_argument('--articles', type=int, default=3, help='article pages to save per feed')
+    syn = sub.add_parser('synthesize', help='write deterministic synthetic feeds')
+    syn.add_argument('--out', default=os.path.join(tempfile.gettempdir(), 'naijabuzz-fixtures'))
+    syn.add_argument('--feeds', type=int, default=24)
+    syn.add_argument('--entries', type=int, default=10)
+    syn.add_argument('--seed', type=int, default=1)
+    srv = sub.add_parser('serve', help='replay a fixture directory over HTTP until interrupted')
+    srv.add_argument('--fixtures', required=True)
+    srv.add_argument('--hosts', type=int, default=8)
+    srv.add_argument('--latency', type=float, default=0.0)
+    args = parser.parse_args()
+    if args.command == 'serve':
+        replay = ReplayServer(args.fixtures, args.hosts, args.latency).start()
+        for cat, url in replay.feeds:
+            print(f"{cat:<16} {url}")
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            replay.stop()
+        return
+    if args.command == 'record':
+        out = record(args.out, args.limit, args.articles)
+    else:
+        out = synthesize(args.out, args.feeds, args.entries, args.seed)
+    print(f"fixtures in {out}")
+
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,100 @@
+"""Benchmark: streaming scan_html() vs the two BeautifulSoup passes it replaced.
+
+"Before" is the old per-entry work: a full BeautifulSoup tree of the summary for the
+excerpt, and another full tree of the entry HTML for the <img> fallback in get_image().
+"After" is the single scan_html() pass build_entry() runs now. Runs on recorded feeds
+(bench/fixtures.py record) or, by default, on freshly synthesized ones. Reports time and
+tracemalloc peak per entry, split by feed shape, and how often both paths agree. Images
+differ on purpose where the first <img> is a logo: the old code gave up, scan_html() keeps
+looking for the first acceptable one.
+
+    python bench/html_scan_bench.py [--fixtures bench/fixtures/recorded] [--repeat 5]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+from collections import defaultdict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+os.environ.setdefault('INIT_DB_ON_STARTUP', '0')
+
+import fixtures  # noqa: E402
+
+
+def soup_path(entry, html):
+    # The code this replaced, verbatim apart from the function wrapper
+    from bs4 import BeautifulSoup
+    summary = entry.get('summary') or entry.get('description') or ''
+    excerpt = BeautifulSoup(summary, 'html.parser').get_text(separator=' ')[:360] + "..." if summary else ""
+    image = None
+    if html:
+        soup = BeautifulSoup(html, 'html.parser')
+        img = soup.find('img')
+        if img and img.get('src'):
+            url = img['src'].strip()
+            if 'punch' not in url.lower() and 'logo' not in url.lower() and 'placeholder' not in url.lower():
+                image = url
+    return excerpt, image
+
+
+def scan_path(entry, html):
+    import main
+    summary = entry.get('summary') or entry.get('description') or ''
+    scan = main.scan_html(html, text_limit=main.EXCERPT_CHARS if summary else 0)
+    return (scan.text + "..." if summary else ""), scan.image
+
+
+def measure(fn, entries, repeat):
+    times, peaks = [], []
+    for entry, html in entries:
+        fn(entry, html)
+        samples = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            fn(entry, html)
+            samples.append(time.perf_counter() - started)
+        tracemalloc.start()
+        fn(entry, html)
+        peaks.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+        times.append(statistics.median(samples))
+    return times, peaks
+
+
+def run():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--fixtures', help='fixture directory (default: synthesize a fresh one)')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    import feedparser
+    import main
+    groups = defaultdict(list)
+    for feed in fixtures.load(fixtures.ensure(args.fixtures)):
+        for entry in feedparser.parse(feed['body']).entries[:main.ENTRIES_PER_FEED * 4]:
+            groups[feed.get('shape', 'recorded')].append((entry, main.entry_html(entry)))
+
+    print(f"{'shape':<16} {'entries':>7} {'avg KB':>7} {'soup':>10} {'scan':>10} {'speedup':>8} "
+          f"{'soup peak':>10} {'scan peak':>10} {'excerpt=':>9} {'image=':>7}")
+    for shape, entries in sorted(groups.items()) + [('all', [e for g in groups.values() for e in g])]:
+        soup_times, soup_peaks = measure(soup_path, entries, args.repeat)
+        scan_times, scan_peaks = measure(scan_path, entries, args.repeat)
+        same_text = same_image = 0
+        for entry, html in entries:
+            before, after = soup_path(entry, html), scan_path(entry, html)
+            # The scanner collapses whitespace runs; compare on words
+            same_text += before[0].split()[:40] == after[0].split()[:40]
+            same_image += before[1] == after[1]
+        size = statistics.mean(len(html) for _, html in entries) / 1024
+        soup_us, scan_us = statistics.mean(soup_times) * 1e6, statistics.mean(scan_times) * 1e6
+        print(f"{shape:<16} {len(entries):>7} {size:>7.1f} {soup_us:>7.0f} us {scan_us:>7.0f} us "
+              f"{soup_us / scan_us:>7.1f}x {max(soup_peaks) / 1024:>7.0f} KB {max(scan_peaks) / 1024:>7.0f} KB "
+              f"{same_text / len(entries):>8.0%} {same_image / len(entries):>7.0%}")
+
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,133 @@
+"""Benchmark: the ingestion pipeline end to end, offline.
+
+Replays fixture feeds and article pages (bench/fixtures.py) from local HTTP servers, swaps
+the LLM providers for StubProvider with a fixed latency and runs run_ingest() against a
+throwaway SQLite database. The first pass is a cold crawl; later passes see unchanged feeds
+(304) and warm caches. Reports entries/s, per-stage latency (fetch, parse, extract, rewrite,
+db, image) from main.STAGE_TIMINGS, peak memory and replay-server request counts as JSON. With
+--baseline it exits non-zero when cold-pass entries/s dropped by more than --tolerance.
+
+    python bench/ingest_bench.py [--fixtures DIR] [--passes 2] [--rewrite-latency 0.2]
+        [--publisher-latency 0.05] [--hosts 8] [--json report.json] [--baseline old.json]
+"""
+import argparse
+import json
+import os
+import resource
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import fixtures  # noqa: E402
+
+
+def peak_rss_mb():
+    # ru_maxrss is KB on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def run_pass(main, replay, feeds, budget, trace):
+    before = dict(replay.requests)
+    if trace:
+        tracemalloc.start()
+    started = time.perf_counter()
+    with main.app.app_context():
+        stats = main.run_ingest(feeds, budget=budget)
+    wall = time.perf_counter() - started
+    heap_peak = tracemalloc.get_traced_memory()[1] / (1024 * 1024) if trace else None
+    if trace:
+        tracemalloc.stop()
+    return {
+        'wall_s': round(wall, 3),
+        'entries_stored': stats['added'],
+        'entries_per_s': round(stats['added'] / wall, 2) if wall else 0.0,
+        'rewritten': stats.get('rewritten', 0),
+        'rewrite_retry': stats.get('rewrite_retry', 0),
+        'skipped': stats['skipped'],
+        'errors': len(stats['errors']),
+        'stages': main.stage_summary(),
+        'requests': {k: replay.requests[k] - before[k] for k in replay.requests},
+        'peak_rss_mb': round(peak_rss_mb(), 1),
+        'peak_heap_mb': round(heap_peak, 1) if heap_peak is not None else None,
+    }
+
+
+def run():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--fixtures', help='fixture directory (default: synthesize a fresh one)')
+    parser.add_argument('--passes', type=int, default=2)
+    parser.add_argument('--budget', type=float, default=120)
+    parser.add_argument('--rewrite-latency', type=float, default=0.2, help='StubProvider seconds per rewrite')
+    parser.add_argument('--publisher-latency', type=float, default=0.05, help='replay server seconds per request')
+    parser.add_argument('--hosts', type=int, default=8, help='loopback addresses to spread feeds over')
+    parser.add_argument('--entries-per-feed', type=int, help='override ENTRIES_PER_FEED')
+    parser.add_argument('--skip-images', action='store_true',
+                        help='no proxy image prefetch (recorded fixtures link to live publisher images)')
+    parser.add_argument('--tracemalloc', action='store_true', help='also report Python heap peak (slower)')
+    parser.add_argument('--json', help='write the report to this file')
+    parser.add_argument('--baseline', help='earlier --json report to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.15)
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix='naijabuzz-ingest-bench-')
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(tmp, 'ingest.db')}"
+    os.environ['INIT_DB_ON_STARTUP'] = '0'
+    os.environ['IMAGE_CACHE_DIR'] = os.path.join(tmp, 'images')
+    # The replay server, images included, lives on loopback addresses
+    os.environ['IMAGE_ALLOW_PRIVATE'] = '1'
+    import main
+    main.init_db()
+    if args.skip_images:
+        main.prefetch_image = lambda src: None
+    main.rewrite_router = main.RewriteRouter([main.StubProvider(latency=args.rewrite_latency)])
+    if args.entries_per_feed:
+        main.ENTRIES_PER_FEED = args.entries_per_feed
+
+    path = fixtures.ensure(args.fixtures)
+    replay = fixtures.ReplayServer(path, hosts=args.hosts, latency=args.publisher_latency).start()
+    report = {
+        'fixtures': path,
+        'config': {
+            'feeds': len(replay.feeds), 'hosts': len(replay.servers), 'entries_per_feed': main.ENTRIES_PER_FEED,
+            'rewrite_latency_s': args.rewrite_latency, 'publisher_latency_s': args.publisher_latency,
+            'fetch_workers': main.FETCH_WORKERS, 'entry_workers': main.ENTRY_WORKERS,
+            'per_host_limit': main.PER_HOST_LIMIT, 'budget_s': args.budget,
+        },
+        'passes': [],
+    }
+    try:
+        for n in range(args.passes):
+            result = run_pass(main, replay, replay.feeds, args.budget, args.tracemalloc)
+            result['pass'] = 'cold' if n == 0 else f'warm-{n}'
+            report['passes'].append(result)
+    finally:
+        replay.stop()
+
+    print(f"\n{len(replay.feeds)} feeds on {len(replay.servers)} hosts, "
+          f"rewrite {args.rewrite_latency}s, publisher {args.publisher_latency}s")
+    for result in report['passes']:
+        print(f"{result['pass']:<8} {result['entries_stored']:>4} stored in {result['wall_s']:>6.2f}s "
+              f"= {result['entries_per_s']:>6.2f}/s, {result['rewritten']} rewritten, "
+              f"peak RSS {result['peak_rss_mb']} MB, requests {result['requests']}")
+        for name, s in result['stages'].items():
+            print(f"    {name:<8} {s['count']:>5}x  p50 {s['p50_ms']:>8.1f} ms  p95 {s['p95_ms']:>8.1f} ms  "
+                  f"max {s['max_ms']:>8.1f} ms  total {s['total_s']:>7.2f} s")
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            before = json.load(f)['passes'][0]['entries_per_s']
+        after = report['passes'][0]['entries_per_s']
+        print(f"cold entries/s {before} -> {after}")
+        if after < before * (1 - args.tolerance):
+            raise SystemExit(f"REGRESSION: cold entries/s fell more than {args.tolerance:.0%}")
+
+
+if __name__ == '__main__':
+    run()
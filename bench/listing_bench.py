@@ -0,0 +1,83 @@
+"""Benchmark: full Post rows vs PostCard projections for listing and related-story queries.
+
+"Before" loads whole ORM objects including full_content, as the listing queries used to.
+"After" is what the routes run now: fetch_listing() / card_query(). Reports median
+latency and tracemalloc peak per query on a seeded SQLite database.
+
+    python bench/listing_bench.py [--rows 100000] [--db /tmp/naijabuzz-bench.db]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from pagination_bench import seed  # noqa: E402
+
+
+def measure(fn, repeat):
+    samples, peaks = [], []
+    for _ in range(repeat):
+        tracemalloc.start()
+        started = time.perf_counter()
+        rows = fn()
+        samples.append(time.perf_counter() - started)
+        peaks.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+        del rows
+    return statistics.median(samples), statistics.median(peaks)
+
+
+def run():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=100_000)
+    parser.add_argument('--db', default='/tmp/naijabuzz-bench.db')
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.abspath(args.db)}"
+    import main
+    from sqlalchemy.orm import undefer
+    main.init_db()
+    total = seed(args.db, args.rows)
+    Post = main.Post
+
+    def full_rows(query):
+        def load():
+            rows = query().options(undefer(Post.full_content)).all()
+            main.db.session.expunge_all()
+            return rows
+        return load
+
+    def listing_full():
+        return (Post.query.filter(Post.category_key == 'football')
+                .order_by(Post.pub_date.desc(), Post.id.desc()).limit(21))
+
+    def related_full():
+        return (Post.query.filter(Post.category_key == 'football', Post.id != 1)
+                .order_by(Post.pub_date.desc(), Post.id.desc()).limit(6))
+
+    cases = [
+        ('listing (21 rows)', full_rows(listing_full), lambda: main.fetch_listing('football', 20)[0]),
+        ('related (6 rows)', full_rows(related_full), lambda: main.as_cards(
+            main.card_query().filter(Post.category_key == 'football', Post.id != 1)
+            .order_by(Post.pub_date.desc(), Post.id.desc()).limit(6))),
+    ]
+    with main.app.app_context():
+        print(f"{total} posts, median of {args.repeat}")
+        print(f"{'query':<18} {'full rows':>11} {'cards':>11} {'peak full':>11} {'peak cards':>11}")
+        for name, before, after in cases:
+            before()
+            after()
+            t_before, m_before = measure(before, args.repeat)
+            t_after, m_after = measure(after, args.repeat)
+            print(f"{name:<18} {t_before * 1e3:>8.2f} ms {t_after * 1e3:>8.2f} ms "
+                  f"{m_before / 1024:>8.0f} KB {m_after / 1024:>8.0f} KB")
+
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,108 @@
+"""Benchmark: OFFSET pagination vs keyset (pub_date, id) cursors on deep listing pages.
+
+Seeds a synthetic SQLite database (1M posts by default, reused between runs) and
+times fetch_listing() for the same pages both ways.
+
+    python bench/pagination_bench.py [--rows 1000000] [--db /tmp/naijabuzz-bench.db] [--cat all]
+"""
+import argparse
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+FEED_CATEGORIES = ["Naija News", "Gossip", "Football", "Sports", "Entertainment",
+                   "Lifestyle", "Education", "Tech", "Viral", "World"]
+
+
+SEED_COLUMNS = ('title', 'excerpt', 'full_content', 'link', 'unique_hash', 'slug', 'image',
+                'category', 'category_key', 'pub_date')
+
+
+def synthetic_rows(start, stop):
+    # Deterministic per row index, so a database can be grown later without duplicate keys
+    base = datetime(2020, 1, 1)
+    for i in range(start, stop):
+        rng = random.Random(i)
+        cat = rng.choice(FEED_CATEGORIES)
+        yield (
+            f"Synthetic story {i}", "Short excerpt for the card. " * 8, "Rewritten body text. " * 150,
+            f"https://example.com/{i}", f"h{i:012d}", f"synthetic-story-{i}",
+            "/static/naijabuzz-placeholder.jpg", cat, cat.lower(),
+            base + timedelta(seconds=i * 90 + rng.randint(0, 60)),
+        )
+
+
+def seed(path, rows):
+    conn = sqlite3.connect(path)
+    have = conn.execute("SELECT COUNT(*) FROM post").fetchone()[0]
+    if have >= rows:
+        conn.close()
+        return have
+    insert = f"INSERT INTO post ({', '.join(SEED_COLUMNS)}) VALUES ({', '.join('?' * len(SEED_COLUMNS))})"
+    batch = []
+    print(f"Seeding {rows - have} synthetic posts into {path} ...", flush=True)
+    for row in synthetic_rows(have, rows):
+        batch.append(row[:-1] + (row[-1].strftime('%Y-%m-%d %H:%M:%S.%f'),))
+        if len(batch) == 20000:
+            conn.executemany(insert, batch)
+            batch = []
+    if batch:
+        conn.executemany(insert, batch)
+    conn.commit()
+    conn.execute("ANALYZE")
+    conn.close()
+    return rows
+
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples)
+
+
+def run():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--db', default='/tmp/naijabuzz-bench.db')
+    parser.add_argument('--cat', default='all')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--pages', default='1,10,100,1000,10000,40000')
+    args = parser.parse_args()
+
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.abspath(args.db)}"
+    import main
+    main.init_db()
+    total = seed(args.db, args.rows)
+    per_page = 20
+
+    with main.app.app_context():
+        print(f"{total} posts, cat={args.cat}, {per_page} per page, median of {args.repeat}")
+        print(f"{'page':>8} {'offset':>12} {'keyset':>12} {'speedup':>9}")
+        for page in (int(p) for p in args.pages.split(',')):
+            # Cursor of the last row on the previous page (what the "Next" link carries)
+            previous, _, _ = main.fetch_listing(args.cat, per_page, page - 1) if page > 1 else ([], False, False)
+            after = main.decode_cursor(main.encode_cursor(previous[-1])) if previous else None
+            if page > 1 and after is None:
+                print(f"{page:>8} past the end")
+                continue
+            offset_rows, _, _ = main.fetch_listing(args.cat, per_page, page)
+            keyset_rows, _, _ = main.fetch_listing(args.cat, per_page, page, after=after)
+            assert [p.id for p in offset_rows] == [p.id for p in keyset_rows], "offset and keyset pages differ"
+            off = timed(lambda: main.fetch_listing(args.cat, per_page, page), args.repeat)
+            key = timed(lambda: main.fetch_listing(args.cat, per_page, page, after=after), args.repeat)
+            main.db.session.expunge_all()
+            print(f"{page:>8} {off * 1e3:>9.2f} ms {key * 1e3:>9.2f} ms {off / key:>8.1f}x")
+
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,83 @@
+"""Microbenchmark: per-request render time of the page templates.
+
+Compares the old path (render_template_string on the full page source with the
+CSS inlined, which compiles the template on every call) against the templates
+precompiled once at import.
+
+    python bench/render_bench.py [--iterations 500] [--posts 20]
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DATABASE_URL', 'sqlite://')
+
+from flask import render_template_string  # noqa: E402
+import main  # noqa: E402
+
+
+def inline_css(template, css_file):
+    with open(os.path.join(main.app.root_path, 'static', css_file)) as f:
+        css = f.read()
+    link = "<link rel=\"stylesheet\" href=\"{{ asset_url('%s') }}\">" % css_file
+    return template.replace(link, "<style>\n%s</style>" % css)
+
+
+def fake_posts(n):
+    now = datetime.now(timezone.utc)
+    return [SimpleNamespace(
+        id=i, title=f"Synthetic headline number {i} about Lagos traffic and the Super Eagles",
+        excerpt="Lorem ipsum dolor sit amet, consectetur adipiscing elit. " * 6,
+        full_content="Paragraph of rewritten article text. " * 120,
+        slug=f"synthetic-headline-{i}", image="/static/naijabuzz-placeholder.jpg",
+        category="Naija News", link="https://example.com/story", pub_date=now - timedelta(minutes=7 * i),
+    ) for i in range(n)]
+
+
+def ago(dt, older=None):
+    return "5m ago"
+
+
+def timed(fn, iterations):
+    fn()  # warm-up
+    started = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - started) / iterations
+
+
+def run():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--iterations', type=int, default=500)
+    parser.add_argument('--posts', type=int, default=20)
+    args = parser.parse_args()
+
+    posts = fake_posts(args.posts + 6)
+    index_ctx = dict(posts=posts[:args.posts], categories=main.CATEGORIES, selected='all', ago=ago, page=2,
+                     has_next=True, page_title="All News - NaijaBuzz", page_desc="desc", featured_img=posts[0].image)
+    post_ctx = dict(post=posts[0], related=posts[-6:], ago=ago, page_title="t", page_desc="d",
+                    featured_img=posts[0].image, categories=main.CATEGORIES, selected='naija news')
+    legacy_index = inline_css(main.INDEX_TEMPLATE, 'css/home.css')
+    legacy_post = inline_css(main.POST_TEMPLATE, 'css/article.css')
+
+    with main.app.test_request_context('/'):
+        cases = [
+            ('index', lambda: render_template_string(legacy_index, **index_ctx),
+             lambda: main.index_template.render(**index_ctx)),
+            ('post_detail', lambda: render_template_string(legacy_post, **post_ctx),
+             lambda: main.post_template.render(**post_ctx)),
+        ]
+        print(f"{'page':<12} {'render_template_string':>24} {'precompiled':>12} {'speedup':>8} {'bytes saved':>12}")
+        for name, legacy, compiled in cases:
+            before = timed(legacy, args.iterations)
+            after = timed(compiled, args.iterations)
+            saved = len(legacy().encode()) - len(compiled().encode())
+            print(f"{name:<12} {before * 1e3:>21.3f} ms {after * 1e3:>9.3f} ms {before / after:>7.1f}x {saved:>12}")
+
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,128 @@
+"""Benchmark: cold start of a web-only worker (import main, no init_db).
+
+Each run is a fresh interpreter started with `python -X importtime`, the same way a gunicorn
+worker imports the app. Reports the wall time to import main, resident memory afterwards,
+the packages with the largest import cost and whether the crawl/LLM dependencies got loaded.
+With --baseline REF the same measurement runs on a `git archive` of REF for a before/after.
+
+    python bench/startup_bench.py [--runs 5] [--baseline HEAD~1] [--json report.json]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tarfile
+import tempfile
+from collections import defaultdict
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CRAWL_MODULES = ('feedparser', 'requests', 'bs4', 'newspaper', 'slugify', 'dateutil',
+                 'openai', 'google.generativeai', 'PIL')
+
+CHILD = """
+import json, sys, time
+started = time.perf_counter()
+import main
+elapsed = time.perf_counter() - started
+rss_kb = 0
+try:
+    with open('/proc/self/status') as f:
+        rss_kb = next(int(line.split()[1]) for line in f if line.startswith('VmRSS:'))
+except OSError:
+    import resource
+    rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print('STARTUP_BENCH ' + json.dumps({
+    'import_s': elapsed, 'rss_kb': rss_kb,
+    'loaded': [m for m in %r if m in sys.modules],
+}))
+""" % (CRAWL_MODULES,)
+
+
+def import_costs(stderr):
+    # -X importtime lines: "import time: self [us] | cumulative | name"; sum self time per package
+    totals = defaultdict(int)
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, _, name = (part.strip() for part in line[len('import time:'):].split('|'))
+        totals[name.split('.')[0]] += int(self_us)
+    return totals
+
+
+def measure(src_dir, runs, db_path):
+    env = dict(os.environ, INIT_DB_ON_STARTUP='0', DATABASE_URL=f"sqlite:///{db_path}",
+               PYTHONDONTWRITEBYTECODE='0')
+    samples = []
+    # One unmeasured run so .pyc files exist, like a deployed worker
+    subprocess.run([sys.executable, '-c', 'import main'], cwd=src_dir, env=env, capture_output=True)
+    for _ in range(runs):
+        proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', CHILD],
+                              cwd=src_dir, env=env, capture_output=True, text=True)
+        line = next((l for l in proc.stdout.splitlines() if l.startswith('STARTUP_BENCH ')), None)
+        if line is None:
+            raise SystemExit(f"import main failed in {src_dir}:\n{proc.stderr[-2000:]}")
+        result = json.loads(line[len('STARTUP_BENCH '):])
+        result['packages'] = import_costs(proc.stderr)
+        samples.append(result)
+    packages = defaultdict(list)
+    for s in samples:
+        for name, us in s['packages'].items():
+            packages[name].append(us)
+    top = sorted(((name, statistics.median(v) / 1000) for name, v in packages.items()), key=lambda p: -p[1])[:10]
+    return {
+        'import_ms': statistics.median(s['import_s'] for s in samples) * 1000,
+        'rss_mb': statistics.median(s['rss_kb'] for s in samples) / 1024,
+        'crawl_modules_loaded': samples[-1]['loaded'],
+        'top_packages_ms': dict((name, round(ms, 1)) for name, ms in top),
+    }
+
+
+def checkout(ref, dest):
+    archive = subprocess.run(['git', 'archive', ref], cwd=ROOT, capture_output=True, check=True).stdout
+    with tempfile.TemporaryFile() as f:
+        f.write(archive)
+        f.seek(0)
+        with tarfile.open(fileobj=f) as tar:
+            tar.extractall(dest)
+
+
+def report(label, result):
+    print(f"{label}: import {result['import_ms']:.0f} ms, RSS {result['rss_mb']:.1f} MB, "
+          f"crawl modules loaded: {', '.join(result['crawl_modules_loaded']) or 'none'}")
+    for name, ms in result['top_packages_ms'].items():
+        print(f"    {name:<24} {ms:>8.1f} ms")
+
+
+def run():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--baseline', help='git ref to compare against, e.g. HEAD~1')
+    parser.add_argument('--json', help='also write the results to this file')
+    args = parser.parse_args()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'startup.db')
+        if args.baseline:
+            base_dir = os.path.join(tmp, 'baseline')
+            os.makedirs(base_dir)
+            checkout(args.baseline, base_dir)
+            results['baseline'] = dict(measure(base_dir, args.runs, db_path), ref=args.baseline)
+        results['current'] = measure(ROOT, args.runs, db_path)
+
+    print(f"Web-only worker cold start, median of {args.runs} runs")
+    for label, result in results.items():
+        report(label, result)
+    if 'baseline' in results:
+        before, after = results['baseline'], results['current']
+        print(f"import time {before['import_ms']:.0f} -> {after['import_ms']:.0f} ms, "
+              f"RSS {before['rss_mb']:.1f} -> {after['rss_mb']:.1f} MB")
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,264 @@
+"""Benchmark: throughput and latency of the public pages as the post table grows.
+
+For each size in --rows, seeds a database with synthetic posts (SQLite files reused between
+runs, or a local Postgres via --database-url) and then hammers each route at a fixed
+concurrency for --duration seconds: `/`, `/?cat=football&page=N`, `/<slug>` and `/sitemap.xml`.
+Requests go through the Flask test client in threads (--server wsgi, measures app cost only)
+or over HTTP to a local gunicorn started like the Procfile does (--server gunicorn). The page
+cache is off unless --page-cache, so repeated URLs still pay for their queries. Reports
+requests/s and p50/p95/p99 per route and size, optionally as JSON; with --p95-budget it exits
+non-zero when any route misses it.
+
+    python bench/web_bench.py [--rows 1000,100000,1000000] [--concurrency 8] [--duration 10]
+        [--server wsgi|gunicorn] [--workers 2] [--database-url postgresql://...] [--json report.json]
+"""
+import argparse
+import http.client
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from pagination_bench import SEED_COLUMNS, synthetic_rows  # noqa: E402
+
+ROUTES = ('index', 'category', 'post', 'sitemap')
+PER_PAGE = 20
+
+
+def seed(main, rows):
+    # Core inserts so it works on SQLite and Postgres alike; the ids follow the row index
+    with main.app.app_context():
+        have = main.db.session.query(main.db.func.count(main.Post.id)).scalar()
+        if have < rows:
+            print(f"Seeding {rows - have} synthetic posts ...", file=sys.stderr, flush=True)
+            table = main.Post.__table__
+            batch = []
+            for row in synthetic_rows(have, rows):
+                batch.append(dict(zip(SEED_COLUMNS, row)))
+                if len(batch) == 5000:
+                    main.db.session.execute(table.insert(), batch)
+                    batch = []
+            if batch:
+                main.db.session.execute(table.insert(), batch)
+            main.db.session.commit()
+            main.db.session.execute(main.text("ANALYZE"))
+            main.db.session.commit()
+        return max(have, rows)
+
+
+def route_path(route, posts, pages, rng):
+    if route == 'index':
+        return '/'
+    if route == 'category':
+        return f'/?cat=football&page={rng.choice(pages)}'
+    if route == 'post':
+        return f'/synthetic-story-{rng.randrange(posts)}'
+    return '/sitemap.xml'
+
+
+def wsgi_client(main):
+    client = main.app.test_client()
+
+    def get(path):
+        resp = client.get(path, headers={'Accept-Encoding': 'gzip'})
+        resp.get_data()
+        return resp.status_code
+    return get
+
+
+def http_client(port):
+    conn = [http.client.HTTPConnection('127.0.0.1', port, timeout=60)]
+
+    def get(path):
+        try:
+            conn[0].request('GET', path, headers={'Accept-Encoding': 'gzip'})
+            resp = conn[0].getresponse()
+            resp.read()
+            return resp.status
+        except (OSError, http.client.HTTPException):
+            conn[0].close()
+            conn[0] = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+            return 599
+    return get
+
+
+def percentile(samples, q):
+    return samples[min(len(samples) - 1, int(q * len(samples)))] if samples else 0.0
+
+
+def drive(make_client, paths, concurrency, duration, warmup):
+    # Closed loop: each thread sends its next request as soon as the last one returns
+    latencies, failures = [], [0]
+    lock = threading.Lock()
+    deadline = [0.0]
+    ready = threading.Barrier(concurrency + 1)
+    go = threading.Event()
+
+    def worker(seed):
+        rng = random.Random(seed)
+        get = make_client()
+        for _ in range(warmup):
+            get(paths(rng))
+        ready.wait()
+        go.wait()
+        mine, failed = [], 0
+        while time.perf_counter() < deadline[0]:
+            started = time.perf_counter()
+            status = get(paths(rng))
+            mine.append(time.perf_counter() - started)
+            failed += status != 200
+        with lock:
+            latencies.extend(mine)
+            failures[0] += failed
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(concurrency)]
+    for t in threads:
+        t.start()
+    # Warm-up done everywhere: set the clock, then let the workers go
+    ready.wait()
+    started = time.perf_counter()
+    deadline[0] = started + duration
+    go.set()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        'requests': len(latencies),
+        'errors': failures[0],
+        'rps': round(len(latencies) / elapsed, 1),
+        'p50_ms': round(percentile(latencies, 0.50) * 1000, 2),
+        'p95_ms': round(percentile(latencies, 0.95) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 2),
+        'max_ms': round(latencies[-1] * 1000, 2) if latencies else 0.0,
+    }
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def start_gunicorn(opts, env):
+    port = free_port()
+    proc = subprocess.Popen([sys.executable, '-m', 'gunicorn', 'main:app', '--bind', f'127.0.0.1:{port}',
+                             '--workers', str(opts['workers']), '--threads', str(opts['threads']),
+                             '--timeout', '60', '--log-level', 'warning'],
+                            cwd=ROOT, env=env, stdout=subprocess.DEVNULL)
+    for _ in range(300):
+        if proc.poll() is not None:
+            raise SystemExit("gunicorn exited during startup")
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=1).close()
+            return proc, port
+        except OSError:
+            time.sleep(0.1)
+    proc.terminate()
+    raise SystemExit("gunicorn did not start listening")
+
+
+def measure(opts):
+    # Runs in a fresh interpreter per size: main binds DATABASE_URL and its caches at import
+    os.environ['DATABASE_URL'] = opts['database_url']
+    os.environ['INIT_DB_ON_STARTUP'] = '0'
+    if not opts['page_cache']:
+        os.environ['PAGE_CACHE_SIZE'] = '0'
+    import main
+    main.init_db()
+    posts = seed(main, opts['rows'])
+    # Posts are spread evenly over the categories; keep requested pages inside the listing
+    last_page = max(1, posts // (len(main.CATEGORIES) - 1) // PER_PAGE)
+    pages = [p for p in opts['pages'] if p <= last_page] or [1]
+
+    proc = None
+    if opts['server'] == 'gunicorn':
+        proc, port = start_gunicorn(opts, dict(os.environ))
+        make_client = lambda: http_client(port)  # noqa: E731
+    else:
+        make_client = lambda: wsgi_client(main)  # noqa: E731
+    results = {}
+    try:
+        for route in opts['routes']:
+            results[route] = drive(make_client, lambda rng, r=route: route_path(r, posts, pages, rng),
+                                   opts['concurrency'], opts['duration'], opts['warmup'])
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait()
+    return {'rows': opts['rows'], 'posts': posts, 'category_pages': pages, 'routes': results}
+
+
+def database_url(opts, rows):
+    if opts['database_url']:
+        return opts['database_url']
+    return f"sqlite:///{os.path.join(opts['db_dir'], f'naijabuzz-web-{rows}.db')}"
+
+
+def run():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', default='1000,100000,1000000', help='comma-separated table sizes')
+    parser.add_argument('--routes', default=','.join(ROUTES))
+    parser.add_argument('--pages', default='1,2,5,10,50', help='category pages to spread requests over')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--duration', type=float, default=10, help='seconds per route')
+    parser.add_argument('--warmup', type=int, default=5, help='unmeasured requests per thread')
+    parser.add_argument('--server', choices=('wsgi', 'gunicorn'), default='wsgi')
+    parser.add_argument('--workers', type=int, default=1, help='gunicorn workers (Procfile: 1)')
+    parser.add_argument('--threads', type=int, default=1, help='gunicorn threads per worker')
+    parser.add_argument('--page-cache', action='store_true', help='leave the rendered-page cache on')
+    parser.add_argument('--database-url', help='e.g. a local Postgres; sizes then grow one database')
+    parser.add_argument('--db-dir', default=tempfile.gettempdir(), help='where the SQLite files live')
+    parser.add_argument('--p95-budget', type=float, help='fail when any route p95 exceeds this many ms')
+    parser.add_argument('--json', help='write the report to this file')
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print('WEB_BENCH ' + json.dumps(measure(json.loads(args.child))))
+        return
+
+    os.makedirs(args.db_dir, exist_ok=True)
+    opts = dict(vars(args), routes=args.routes.split(','), pages=[int(p) for p in args.pages.split(',')])
+    del opts['child'], opts['json'], opts['p95_budget']
+    report = {'config': dict(opts, rows=None), 'results': []}
+    for rows in sorted(int(r) for r in args.rows.split(',')):
+        child = dict(opts, rows=rows, database_url=database_url(opts, rows))
+        print(f"{rows} posts: {args.server}, concurrency {args.concurrency}, {args.duration:g}s per route ...",
+              flush=True)
+        proc = subprocess.run([sys.executable, os.path.abspath(__file__), '--child', json.dumps(child)],
+                              cwd=ROOT, stdout=subprocess.PIPE, text=True)
+        line = next((l for l in proc.stdout.splitlines() if l.startswith('WEB_BENCH ')), None)
+        if line is None:
+            raise SystemExit(f"run with {rows} rows failed (exit {proc.returncode})")
+        report['results'].append(json.loads(line[len('WEB_BENCH '):]))
+
+    print(f"\n{'posts':>9} {'route':<10} {'req/s':>8} {'p50':>9} {'p95':>9} {'p99':>9} {'errors':>7}")
+    over = []
+    for result in report['results']:
+        for route, r in result['routes'].items():
+            print(f"{result['posts']:>9} {route:<10} {r['rps']:>8.1f} {r['p50_ms']:>6.1f} ms {r['p95_ms']:>6.1f} ms "
+                  f"{r['p99_ms']:>6.1f} ms {r['errors']:>7}")
+            if args.p95_budget is not None:
+                r['within_budget'] = r['p95_ms'] <= args.p95_budget
+                if not r['within_budget']:
+                    over.append(f"{route} at {result['posts']} posts ({r['p95_ms']} ms)")
+    if args.json:
+        report['config']['p95_budget_ms'] = args.p95_budget
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+    if over:
+        raise SystemExit(f"p95 over {args.p95_budget:g} ms: " + ', '.join(over))
+
+
+if __name__ == '__main__':
+    run()
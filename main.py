@@ -1,19 +1,29 @@
-from flask import Flask, render_template_string, request, abort, send_from_directory
+import time
+_startup_started = time.perf_counter()
+
+from flask import Flask, request, abort, jsonify, send_file, send_from_directory, has_request_context, stream_with_context
 from flask_sqlalchemy import SQLAlchemy
-import os, feedparser, random, hashlib
+import os, sys, subprocess, hashlib, threading, random, heapq, calendar, re, gzip, zlib, html, hmac, io, tempfile, socket, uuid
+import ipaddress, secrets
+import click
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from contextlib import contextmanager
 from datetime import datetime, timedelta, timezone
-from bs4 import BeautifulSoup
-from dateutil import parser as date_parser
 import urllib.parse
-import requests
-from newspaper import Article
-from slugify import slugify
-from openai import OpenAI
-import google.generativeai as genai
 from functools import lru_cache
-from sqlalchemy import text
+from collections import namedtuple, OrderedDict, deque, defaultdict
+import sqlalchemy
+from sqlalchemy import text, or_
+from sqlalchemy.orm import undefer
+from sqlalchemy.schema import CreateIndex
+from email.utils import parsedate_to_datetime
+from html.parser import HTMLParser
+
+# Startup phases in seconds, reported once the module has loaded
+STARTUP_TIMINGS = {'imports': time.perf_counter() - _startup_started}
 
-app = Flask(__name__)
+# Static files go through serve_static() below so hashed asset URLs can be cached forever
+app = Flask(__name__, static_folder=None)
 
 # Database configuration (Render uses DATABASE_URL from env)
 db_uri = os.environ.get('DATABASE_URL') or 'sqlite:///posts.db'
@@ -28,17 +38,292 @@ class Post(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(600))
     excerpt = db.Column(db.Text)
-    full_content = db.Column(db.Text)
+    # Multi-KB rewrite: only loaded when an article page asks for it
+    full_content = db.deferred(db.Column(db.Text))
     link = db.Column(db.String(600))
     unique_hash = db.Column(db.String(64), unique=True)
     slug = db.Column(db.String(200), unique=True)
     image = db.Column(db.String(600), default="/static/img/naijabuzz-placeholder.jpg")
     category = db.Column(db.String(100))
+    # Normalized CATEGORIES key ("Naija News" -> "naija news"), filled in from category on insert
+    category_key = db.Column(db.String(100), default=lambda ctx: category_key(ctx.get_current_parameters().get('category')))
     pub_date = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
 
+    __table_args__ = (
+        db.Index('ix_post_pub_date_id', 'pub_date', 'id'),
+        db.Index('ix_post_category_key_pub_date', 'category_key', pub_date.desc(), id.desc()),
+        db.Index('ix_post_link', 'link'),
+    )
+
+def category_key(name):
+    return (name or '').strip().lower() or None
+
+# Per-feed fetch state for conditional GETs (ETag / Last-Modified)
+class FeedState(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    url = db.Column(db.String(600), unique=True, nullable=False)
+    etag = db.Column(db.String(300))
+    modified = db.Column(db.String(100))
+    last_status = db.Column(db.Integer)
+    last_duration = db.Column(db.Float)
+    last_fetched = db.Column(db.DateTime)
+    # Adaptive polling schedule
+    next_poll_at = db.Column(db.DateTime)
+    poll_interval = db.Column(db.Float)
+    posts_per_hour = db.Column(db.Float)
+    failures = db.Column(db.Integer, default=0)
+    # Which ingestion worker is polling this feed right now (see IngestLease)
+    claimed_by = db.Column(db.String(120))
+    claimed_until = db.Column(db.DateTime)
+
+# Entries already handled (stored, or failed for good), keyed by feed URL + GUID/link,
+# so they are skipped before any network work
+class SeenEntry(db.Model):
+    key = db.Column(db.String(32), primary_key=True)
+    feed_url = db.Column(db.String(600))
+    status = db.Column(db.String(10), nullable=False)
+    attempts = db.Column(db.Integer, default=0)
+    first_seen = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+    last_seen = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+
+# Content-addressed store of finished LLM rewrites (key = sha256 of title + text)
+class RewriteCache(db.Model):
+    key = db.Column(db.String(64), primary_key=True)
+    content = db.Column(db.Text, nullable=False)
+    created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+    last_used = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+
+# Posts waiting for an LLM rewrite; the post is live with its excerpt meanwhile
+class RewriteJob(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    post_id = db.Column(db.Integer, db.ForeignKey('post.id'), unique=True, nullable=False)
+    post = db.relationship('Post')
+    source_text = db.Column(db.Text)
+    status = db.Column(db.String(20), default='pending', index=True)
+    attempts = db.Column(db.Integer, default=0)
+    not_before = db.Column(db.DateTime)
+    updated_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+
+# One row per running ingestion worker, kept alive by a heartbeat. A worker that dies stops
+# heartbeating; its row and its feed claims expire after INGEST_LEASE_TTL.
+class IngestLease(db.Model):
+    owner = db.Column(db.String(120), primary_key=True)
+    host = db.Column(db.String(200))
+    pid = db.Column(db.Integer)
+    phase = db.Column(db.String(20))
+    feeds = db.Column(db.Integer, default=0)
+    started_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+    heartbeat_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+    expires_at = db.Column(db.DateTime, index=True)
+
+# Per-deployment random keys, generated by whichever process needs one first
+class AppSecret(db.Model):
+    name = db.Column(db.String(50), primary_key=True)
+    value = db.Column(db.String(128), nullable=False)
+    created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+
+# Bumped by ingestion whenever a category (or the home page, scope 'all') gets new content
+class ContentVersion(db.Model):
+    scope = db.Column(db.String(100), primary_key=True)
+    version = db.Column(db.Integer, default=0, nullable=False)
+    updated_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+
+def bump_content_versions(categories):
+    now = datetime.now(timezone.utc)
+    for scope in {'all'} | {category_key(c) for c in categories if c}:
+        updated = ContentVersion.query.filter_by(scope=scope).update(
+            {'version': ContentVersion.version + 1, 'updated_at': now}, synchronize_session=False)
+        if not updated:
+            db.session.add(ContentVersion(scope=scope, version=1, updated_at=now))
+    try:
+        db.session.commit()
+    except Exception as ex:
+        db.session.rollback()
+        print(f"[PAGE CACHE] version bump failed: {ex}")
+
+# Versioned schema migrations. create_all() only creates missing tables; every change to an
+# existing table is a numbered migration below, applied once, in order, at startup.
+class SchemaMigration(db.Model):
+    version = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(200))
+    applied_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+
+MIGRATIONS = []
+MIGRATION_LOCK_ID = 7312024
+MIGRATION_LOCK_POLL = 0.5
+
+def migration(version, name):
+    def register(fn):
+        MIGRATIONS.append((version, name, fn))
+        MIGRATIONS.sort(key=lambda m: m[0])
+        return fn
+    return register
+
+def add_column(column):
+    table = column.table.name
+    if column.name in {c['name'] for c in sqlalchemy.inspect(db.engine).get_columns(table)}:
+        return
+    ddl = f'ALTER TABLE {table} ADD COLUMN {column.name} {column.type.compile(db.engine.dialect)}'
+    print(f"[MIGRATE] {ddl}")
+    with db.engine.begin() as conn:
+        conn.execute(text(ddl))
+
+def create_index_concurrently(name, ddl):
+    # CONCURRENTLY keeps the table readable and writable while the index builds. A build that
+    # failed half-way leaves an INVALID index that IF NOT EXISTS would skip forever: rebuild it.
+    with db.engine.connect().execution_options(isolation_level='AUTOCOMMIT') as conn:
+        valid = conn.execute(text(
+            "SELECT i.indisvalid FROM pg_class c JOIN pg_index i ON i.indexrelid = c.oid WHERE c.relname = :name"
+        ), {'name': name}).scalar()
+        if valid:
+            return
+        if valid is False:
+            print(f"[MIGRATE] DROP INDEX {name} (invalid)")
+            conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {name}"))
+        print(f"[MIGRATE] CREATE INDEX {name}")
+        conn.execute(text(ddl))
+
+def create_index(index):
+    if db.engine.dialect.name == 'postgresql':
+        ddl = str(CreateIndex(index, if_not_exists=True).compile(dialect=db.engine.dialect))
+        create_index_concurrently(index.name, ddl.replace('INDEX', 'INDEX CONCURRENTLY', 1))
+        return
+    if index.name in {ix['name'] for ix in sqlalchemy.inspect(db.engine).get_indexes(index.table.name)}:
+        return
+    print(f"[MIGRATE] CREATE INDEX {index.name}")
+    index.create(db.engine, checkfirst=True)
+
+def post_index(name):
+    return next(ix for ix in Post.__table__.indexes if ix.name == name)
+
+@migration(1, 'feed_state: adaptive schedule columns')
+def _add_feed_schedule():
+    for name in ('next_poll_at', 'poll_interval', 'posts_per_hour', 'failures'):
+        add_column(FeedState.__table__.c[name])
+
+@migration(2, 'post: category_key column and backfill')
+def _add_post_category_key():
+    add_column(Post.__table__.c.category_key)
+    with db.engine.begin() as conn:
+        filled = conn.execute(text(
+            "UPDATE post SET category_key = lower(trim(category)) WHERE category_key IS NULL AND category IS NOT NULL"
+        )).rowcount
+    print(f"[MIGRATE] Backfilled category_key on {filled} posts")
+
+@migration(3, 'post: listing, category and link indexes')
+def _add_post_indexes():
+    for name in ('ix_post_pub_date_id', 'ix_post_category_key_pub_date', 'ix_post_link'):
+        create_index(post_index(name))
+
+# Postgres searches this expression through a GIN expression index. A stored generated column
+# would rewrite the whole table under an ACCESS EXCLUSIVE lock; the index builds CONCURRENTLY.
+PG_SEARCH_VECTOR = ("(setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+                    "setweight(to_tsvector('english', regexp_replace(coalesce(full_content, ''), '<[^>]+>', ' ', 'g')), 'B'))")
+
+def create_pg_search_index():
+    create_index_concurrently('ix_post_search',
+                              f"CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_post_search ON post USING gin ({PG_SEARCH_VECTOR})")
+
+@migration(4, 'post: full-text search index')
+def _add_post_search():
+    if db.engine.dialect.name == 'postgresql':
+        create_pg_search_index()
+        return
+    try:
+        with db.engine.begin() as conn:
+            conn.execute(text(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS post_fts USING fts5("
+                "title, body, tokenize = 'porter unicode61 remove_diacritics 2')"))
+    except sqlalchemy.exc.OperationalError as ex:
+        print(f"[MIGRATE] FTS5 not available, /search will fall back to title LIKE: {ex}")
+        return
+    # Backfill in batches; new and rewritten posts are indexed by the Post listeners below
+    indexed = 0
+    with db.engine.begin() as conn:
+        conn.execute(text("DELETE FROM post_fts"))
+        rows = conn.execution_options(yield_per=1000).execute(text("SELECT id, title, full_content FROM post"))
+        for batch in rows.partitions():
+            conn.execute(text("INSERT INTO post_fts(rowid, title, body) VALUES (:id, :title, :body)"),
+                         [{'id': r.id, 'title': r.title or '', 'body': search_text(r.full_content)} for r in batch])
+            indexed += len(batch)
+    print(f"[MIGRATE] Indexed {indexed} posts for search")
+
+@migration(5, 'feed_state: per-worker feed claims')
+def _add_feed_claims():
+    for name in ('claimed_by', 'claimed_until'):
+        add_column(FeedState.__table__.c[name])
+
+@migration(6, 'post: search expression index replaces the search_vector column')
+def _replace_search_vector():
+    # Databases that ran the first version of 004 got a generated column instead; for new ones this is a no-op
+    if db.engine.dialect.name != 'postgresql':
+        return
+    create_pg_search_index()
+    with db.engine.connect().execution_options(isolation_level='AUTOCOMMIT') as conn:
+        conn.execute(text("DROP INDEX CONCURRENTLY IF EXISTS ix_post_search_vector"))
+    try:
+        # Dropping a column only touches the catalog, but give up rather than queue readers behind us
+        with db.engine.begin() as conn:
+            conn.execute(text("SET LOCAL lock_timeout = '5s'"))
+            conn.execute(text("ALTER TABLE post DROP COLUMN IF EXISTS search_vector"))
+    except sqlalchemy.exc.OperationalError as ex:
+        print(f"[MIGRATE] search_vector left in place, drop it by hand: {str(ex)[:120]}")
+
+@contextmanager
+def migration_lock():
+    # Web and worker processes may start together; only one of them migrates
+    if db.engine.dialect.name != 'postgresql':
+        yield
+        return
+    with db.engine.connect().execution_options(isolation_level='AUTOCOMMIT') as conn:
+        # Poll rather than block in pg_advisory_lock(): a backend waiting on the lock keeps a snapshot
+        # open, and CREATE INDEX CONCURRENTLY in the process holding it would wait for that snapshot
+        waiting = False
+        while not conn.execute(text("SELECT pg_try_advisory_lock(:id)"), {'id': MIGRATION_LOCK_ID}).scalar():
+            if not waiting:
+                print("[MIGRATE] Another process is migrating, waiting")
+                waiting = True
+            time.sleep(MIGRATION_LOCK_POLL)
+        try:
+            yield
+        finally:
+            conn.execute(text("SELECT pg_advisory_unlock(:id)"), {'id': MIGRATION_LOCK_ID})
+
+def run_migrations():
+    with migration_lock():
+        applied = {v for (v,) in db.session.query(SchemaMigration.version)}
+        db.session.rollback()
+        for version, name, fn in MIGRATIONS:
+            if version in applied:
+                continue
+            started = time.monotonic()
+            fn()
+            db.session.add(SchemaMigration(version=version, name=name))
+            db.session.commit()
+            print(f"[MIGRATE] {version:03d} {name} ({time.monotonic() - started:.1f}s)")
+
+_db_ready = False
+
 def init_db():
+    # Once per process: at startup, or from the ingestion worker. Never per request.
+    global _db_ready, SEARCH_BACKEND
+    if _db_ready:
+        return
     with app.app_context():
         db.create_all()
+        run_migrations()
+        SEARCH_BACKEND = detect_search_backend()
+    _db_ready = True
+
+@app.cli.command('migrate')
+def migrate_command():
+    """Create missing tables and apply pending schema migrations."""
+    init_db()
+    with app.app_context():
+        applied = {m.version: m for m in SchemaMigration.query.all()}
+    for version, name, _ in MIGRATIONS:
+        m = applied.get(version)
+        print(f"{version:03d} {'applied ' + m.applied_at.strftime('%Y-%m-%d %H:%M') if m else 'PENDING':<24} {name}")
 
 CATEGORIES = {
     "all": "All News",
@@ -108,7 +393,170 @@ FEEDS = [
     ("World", "https://www.theguardian.com/world/rss"),
 ]
 
-def get_image(entry):
+# Ingestion engine settings
+FETCH_WORKERS = int(os.environ.get('FETCH_WORKERS', 16))
+ENTRY_WORKERS = int(os.environ.get('ENTRY_WORKERS', 8))
+PER_HOST_LIMIT = int(os.environ.get('PER_HOST_LIMIT', 2))
+ENTRIES_PER_FEED = int(os.environ.get('ENTRIES_PER_FEED', 3))
+FEED_TIMEOUT = float(os.environ.get('FEED_TIMEOUT', 10))
+CRON_TIME_BUDGET = float(os.environ.get('CRON_TIME_BUDGET', 50))
+REWRITE_BUDGET_SHARE = float(os.environ.get('REWRITE_BUDGET_SHARE', 0.4))
+REWRITE_BATCH = int(os.environ.get('REWRITE_BATCH', 50))
+REWRITE_MAX_ATTEMPTS = int(os.environ.get('REWRITE_MAX_ATTEMPTS', 3))
+REWRITE_RETRY_BASE = float(os.environ.get('REWRITE_RETRY_BASE', 300))
+HTTP_HEADERS = {'User-Agent': 'Mozilla/5.0 (compatible; NaijaBuzzBot/1.0; +https://naijabuzz.com)'}
+
+# One semaphore per publisher host so a big fan-out never hammers a single site
+_host_slots = {}
+_host_slots_lock = threading.Lock()
+
+@contextmanager
+def host_slot(url):
+    host = urllib.parse.urlsplit(url).netloc.lower()
+    with _host_slots_lock:
+        slot = _host_slots.get(host)
+        if slot is None:
+            slot = _host_slots[host] = threading.BoundedSemaphore(PER_HOST_LIMIT)
+    with slot:
+        yield
+
+# Wall time per pipeline stage (fetch, parse, extract, rewrite, db, image) of the current ingest run,
+# summarised at the end of run_ingest() and read by bench/ingest_bench.py
+STAGE_TIMINGS = defaultdict(list)
+_stage_lock = threading.Lock()
+
+@contextmanager
+def stage(name):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        with _stage_lock:
+            STAGE_TIMINGS[name].append(elapsed)
+
+def reset_stage_timings():
+    with _stage_lock:
+        STAGE_TIMINGS.clear()
+
+def stage_summary():
+    with _stage_lock:
+        samples = {name: sorted(values) for name, values in STAGE_TIMINGS.items()}
+    return {name: {
+        'count': len(v),
+        'total_s': round(sum(v), 3),
+        'p50_ms': round(v[len(v) // 2] * 1000, 1),
+        'p95_ms': round(v[min(len(v) - 1, int(len(v) * 0.95))] * 1000, 1),
+        'max_ms': round(v[-1] * 1000, 1),
+    } for name, v in samples.items()}
+
+ARTICLE_CACHE_SIZE = int(os.environ.get('ARTICLE_CACHE_SIZE', 256))
+ArticleData = namedtuple('ArticleData', 'text top_image title authors publish_date meta_description')
+
+def absolute_url(url, base):
+    if url.startswith('//'):
+        return 'https:' + url
+    if not url.startswith('http'):
+        return urllib.parse.urljoin(base, url)
+    return url
+
+# One download + one parse per article URL, shared by image discovery and full text.
+# Failures are cached as None too, so a dead link is not retried within the same process.
+@lru_cache(maxsize=ARTICLE_CACHE_SIZE)
+def extract_article(url):
+    from newspaper import Article
+    try:
+        article = Article(url, fetch_images=False, request_timeout=10)
+        with host_slot(url):
+            article.download()
+        article.parse()
+    except Exception as ex:
+        print(f"[EXTRACT FAILED] {url}: {ex}")
+        return None
+    return ArticleData(
+        text=article.text or '',
+        top_image=absolute_url(article.top_image, url) if article.top_image else '',
+        title=article.title or '',
+        authors=tuple(article.authors or ()),
+        publish_date=article.publish_date,
+        meta_description=article.meta_description or '',
+    )
+
+# Feed HTML (summaries, Blogger-style full posts) is scanned once, as a stream, for both the excerpt
+# text and the first usable <img>; scanning stops as soon as both are known.
+EXCERPT_CHARS = 360
+HTML_SCAN_CHUNK = 2048
+HTML_SCAN_LIMIT = int(os.environ.get('HTML_SCAN_LIMIT', 200_000))
+HtmlScan = namedtuple('HtmlScan', 'text image')
+
+def acceptable_image(url):
+    lowered = url.lower()
+    return bool(url) and not lowered.startswith('data:') and not any(
+        word in lowered for word in ('punch', 'logo', 'placeholder'))
+
+class HtmlScanner(HTMLParser):
+    SKIP = {'script', 'style', 'noscript', 'template'}
+
+    def __init__(self, text_limit):
+        super().__init__(convert_charrefs=True)
+        self.text_limit = text_limit
+        self.parts = []
+        self.length = 0
+        self.image = None
+        self.skipping = 0
+
+    @property
+    def done(self):
+        return self.length >= self.text_limit and self.image is not None
+
+    def handle_starttag(self, tag, attrs):
+        self.boundary()
+        if tag in self.SKIP:
+            self.skipping += 1
+        elif tag == 'img' and self.image is None:
+            src = (dict(attrs).get('src') or '').strip()
+            if acceptable_image(src):
+                self.image = src
+
+    def handle_endtag(self, tag):
+        self.boundary()
+        if tag in self.SKIP and self.skipping:
+            self.skipping -= 1
+
+    def boundary(self):
+        # Text on either side of a tag counts as separate words, like get_text(separator=' ')
+        if self.parts and self.parts[-1] != ' ' and self.length < self.text_limit:
+            self.parts.append(' ')
+
+    def handle_data(self, data):
+        # Raw pieces: a text run cut by a chunk boundary arrives in two calls and must not be
+        # split into two words. Whitespace is collapsed once, in scan_html().
+        if self.skipping or self.length >= self.text_limit:
+            return
+        self.parts.append(data)
+        # Non-space characters only: never more than the collapsed length, so we never stop short
+        self.length += len(data) - sum(map(data.count, ' \t\n\r\f\v'))
+
+def scan_html(markup, text_limit=EXCERPT_CHARS):
+    """First text_limit characters of text (whitespace collapsed) and the first acceptable
+    <img> src from an HTML fragment, without building a tree."""
+    scanner = HtmlScanner(text_limit)
+    end = min(len(markup or ''), HTML_SCAN_LIMIT)
+    for start in range(0, end, HTML_SCAN_CHUNK):
+        scanner.feed(markup[start:start + HTML_SCAN_CHUNK])
+        if scanner.done:
+            break
+    else:
+        scanner.close()
+    return HtmlScan(' '.join(''.join(scanner.parts).split())[:text_limit], scanner.image)
+
+def entry_html(entry):
+    content = entry.get('summary') or entry.get('description') or ''
+    if not content and hasattr(entry, 'content'):
+        content = entry.content[0].get('value', '') if entry.content else ''
+    return content
+
+def get_image(entry, scan=None):
     # Priority 1: media_thumbnail (often best quality)
     if hasattr(entry, 'media_thumbnail') and entry.media_thumbnail:
         return entry.media_thumbnail[0]['url']
@@ -126,63 +574,391 @@ def get_image(entry):
                 return e.get('url') or e.get('href')
 
     # Priority 4: newspaper3k article parsing (most reliable for real images)
-    try:
-        article = Article(entry.link, fetch_images=False, request_timeout=8)
-        article.download()
-        article.parse()
-        if article.top_image and 'punch' not in article.top_image.lower() and 'logo' not in article.top_image.lower():
-            img = article.top_image
-            if img.startswith('//'):
-                img = 'https:' + img
-            elif not img.startswith('http'):
-                img = urllib.parse.urljoin(entry.link, img)
-            return img
-    except Exception:
-        pass
+    article = extract_article(entry.link)
+    if article and article.top_image and 'punch' not in article.top_image.lower() and 'logo' not in article.top_image.lower():
+        return article.top_image
 
-    # Priority 5: fallback to soup in content/summary
-    content = entry.get('summary') or entry.get('description') or ''
-    if not content and hasattr(entry, 'content'):
-        content = entry.content[0].get('value', '') if entry.content else ''
-    if content:
-        soup = BeautifulSoup(content, 'html.parser')
-        img = soup.find('img')
-        if img and img.get('src'):
-            url = img['src'].strip()
-            if 'punch' not in url.lower() and 'logo' not in url.lower() and 'placeholder' not in url.lower():
-                if url.startswith('//'):
-                    url = 'https:' + url
-                elif not url.startswith('http'):
-                    url = urllib.parse.urljoin(entry.link, url)
-                return url
+    # Priority 5: first acceptable <img> in the entry's own HTML (build_entry passes its excerpt scan)
+    if scan is None:
+        scan = scan_html(entry_html(entry), text_limit=0)
+    if scan.image:
+        return absolute_url(scan.image, entry.link)
 
     # Ultimate fallback: custom placeholder
     return "/static/img/naijabuzz-placeholder.jpg"
 
 def parse_date(d):
+    from dateutil import parser as date_parser
     if not d: return datetime.now(timezone.utc)
     try: return date_parser.parse(d).astimezone(timezone.utc)
     except: return datetime.now(timezone.utc)
 
 # API Clients
 GROQ_API_KEY = os.environ.get('GROQ_API_KEY')
-groq_client = OpenAI(
-    api_key=GROQ_API_KEY,
-    base_url="https://api.groq.com/openai/v1"
-) if GROQ_API_KEY else None
 
 GEMINI_API_KEY = os.environ.get('GEMINI_API_KEY')
 
 HF_API_KEY = os.environ.get('HUGGINGFACE_API_KEY')
 
-# Cache rewrites
-@lru_cache(maxsize=500)
-def cached_rewrite(key):
-    return None
+# Cache rewrites: in-process LRU in front of the RewriteCache table
+REWRITE_CACHE_SIZE = int(os.environ.get('REWRITE_CACHE_SIZE', 500))
+REWRITE_CACHE_DAYS = int(os.environ.get('REWRITE_CACHE_DAYS', 30))
+REWRITE_CACHE_STATS = {'hits': 0, 'misses': 0}
+_rewrite_lru = OrderedDict()
+_rewrite_lock = threading.Lock()
 
-def rewrite_article(full_text, title, category):
-    cache_key = hashlib.sha256((title + full_text[:1000]).encode()).hexdigest()
-    cached = cached_rewrite(cache_key)
+def _remember_rewrite(key, content):
+    with _rewrite_lock:
+        _rewrite_lru[key] = content
+        _rewrite_lru.move_to_end(key)
+        while len(_rewrite_lru) > REWRITE_CACHE_SIZE:
+            _rewrite_lru.popitem(last=False)
+
+def cached_rewrite(key, count_miss=True):
+    with _rewrite_lock:
+        content = _rewrite_lru.get(key)
+        if content is not None:
+            _rewrite_lru.move_to_end(key)
+            REWRITE_CACHE_STATS['hits'] += 1
+            return content
+    # Own app context so this also works from ingestion worker threads
+    with app.app_context():
+        try:
+            row = db.session.get(RewriteCache, key)
+            if row:
+                content = row.content
+                row.last_used = datetime.now(timezone.utc)
+                db.session.commit()
+        except Exception as ex:
+            db.session.rollback()
+            print(f"[CACHE] lookup failed: {ex}")
+    if content is not None or count_miss:
+        with _rewrite_lock:
+            REWRITE_CACHE_STATS['hits' if content is not None else 'misses'] += 1
+    if content is not None:
+        _remember_rewrite(key, content)
+    return content
+
+def store_rewrite(key, content):
+    _remember_rewrite(key, content)
+    with app.app_context():
+        try:
+            db.session.merge(RewriteCache(key=key, content=content))
+            db.session.commit()
+        except Exception as ex:
+            db.session.rollback()
+            print(f"[CACHE] store failed: {ex}")
+
+def prune_rewrite_cache():
+    cutoff = datetime.now(timezone.utc) - timedelta(days=REWRITE_CACHE_DAYS)
+    removed = RewriteCache.query.filter(RewriteCache.last_used < cutoff).delete(synchronize_session=False)
+    db.session.commit()
+    return removed
+
+# Rewrite providers: each keeps one reusable client, a circuit breaker and a
+# rolling latency window. The router tries the fastest healthy one first.
+PROVIDER_TIMEOUT = float(os.environ.get('PROVIDER_TIMEOUT', 45))
+REWRITE_DEADLINE = float(os.environ.get('REWRITE_DEADLINE', 60))
+BREAKER_THRESHOLD = int(os.environ.get('BREAKER_THRESHOLD', 3))
+BREAKER_COOLDOWN = float(os.environ.get('BREAKER_COOLDOWN', 120))
+BREAKER_MAX_COOLDOWN = 3600
+LATENCY_WINDOW = 50
+
+REWRITE_PROMPT = """
+    Rewrite this article completely in your own words as an original piece for Nigerian readers.
+    Include relevant Naija context, implications, or angles where natural.
+    Keep tone neutral but interesting. Structure: hook intro, main body (short paragraphs), conclusion.
+    Aim for 300–500 words. Do NOT copy original sentences directly.
+    Original title: {title}
+    Category: {category}
+    Content: {content}
+"""
+
+DEFAULT_RETRY_AFTER = float(os.environ.get('DEFAULT_RETRY_AFTER', 60))
+
+class RateLimited(Exception):
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+def retry_after_seconds(exc):
+    # Returns how long to back off if exc is a 429 from any provider SDK, else None
+    resp = getattr(exc, 'response', None)
+    status = getattr(exc, 'status_code', None) or getattr(resp, 'status_code', None)
+    if status != 429 and type(exc).__name__ not in ('RateLimited', 'RateLimitError', 'ResourceExhausted'):
+        return None
+    if getattr(exc, 'retry_after', None):
+        return float(exc.retry_after)
+    header = resp.headers.get('Retry-After') if resp is not None and hasattr(resp, 'headers') else None
+    if header:
+        try:
+            return max(0.0, float(header))
+        except ValueError:
+            try:
+                return max(0.0, (parsedate_to_datetime(header) - datetime.now(timezone.utc)).total_seconds())
+            except Exception:
+                pass
+    return DEFAULT_RETRY_AFTER
+
+class RewriteProvider:
+    name = 'base'
+    concurrency = 2
+    rpm = 30
+
+    def __init__(self):
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+        self.failures = 0
+        self.open_until = 0.0
+        self.throttled_until = 0.0
+        self.next_start = 0.0
+        self.lock = threading.Lock()
+        self._client = None
+        # e.g. GEMINI_CONCURRENCY=4, GROQ_RPM=30
+        self.concurrency = int(os.environ.get(f'{self.name.upper()}_CONCURRENCY', self.concurrency))
+        self.rpm = float(os.environ.get(f'{self.name.upper()}_RPM', self.rpm))
+        self.slots = threading.BoundedSemaphore(self.concurrency)
+
+    def configured(self):
+        return True
+
+    def client(self):
+        # Built once per process and reused for every article
+        with self.lock:
+            if self._client is None:
+                self._client = self.make_client()
+            return self._client
+
+    def make_client(self):
+        return None
+
+    def generate(self, title, category, text, timeout):
+        raise NotImplementedError
+
+    def available(self, now=None):
+        now = now or time.monotonic()
+        return self.configured() and now >= self.open_until and now >= self.throttled_until
+
+    def try_acquire(self):
+        # Claims a concurrency slot and a start time that respects the provider's RPM.
+        # Returns seconds to wait before calling, or None when all slots are busy.
+        if not self.slots.acquire(blocking=False):
+            return None
+        with self.lock:
+            now = time.monotonic()
+            start = max(now, self.next_start)
+            self.next_start = start + (60.0 / self.rpm if self.rpm else 0)
+        return start - now
+
+    def release(self):
+        self.slots.release()
+
+    def throttle(self, seconds):
+        with self.lock:
+            self.throttled_until = max(self.throttled_until, time.monotonic() + seconds)
+        print(f"[{self.name}] rate limited, pausing {seconds:.0f}s")
+
+    def record_success(self, latency):
+        with self.lock:
+            self.latencies.append(latency)
+            self.failures = 0
+            self.open_until = 0.0
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            if self.failures >= BREAKER_THRESHOLD:
+                # Open the breaker; each further failed trial doubles the cooldown
+                cooldown = min(BREAKER_COOLDOWN * 2 ** (self.failures - BREAKER_THRESHOLD), BREAKER_MAX_COOLDOWN)
+                self.open_until = time.monotonic() + cooldown
+                print(f"[{self.name}] circuit open for {cooldown:.0f}s after {self.failures} failures")
+
+    def percentile(self, q):
+        with self.lock:
+            samples = sorted(self.latencies)
+        if not samples:
+            return None
+        return samples[min(len(samples) - 1, int(q * len(samples)))]
+
+    def stats(self):
+        return {
+            'configured': self.configured(),
+            'circuit_open': time.monotonic() < self.open_until,
+            'throttled': time.monotonic() < self.throttled_until,
+            'concurrency': self.concurrency,
+            'rpm': self.rpm,
+            'failures': self.failures,
+            'p50': self.percentile(0.5),
+            'p95': self.percentile(0.95),
+            'samples': len(self.latencies),
+        }
+
+class GeminiProvider(RewriteProvider):
+    name = 'Gemini'
+    concurrency = 4
+    rpm = 15
+
+    def configured(self):
+        return bool(GEMINI_API_KEY)
+
+    def make_client(self):
+        import google.generativeai as genai
+        genai.configure(api_key=GEMINI_API_KEY)
+        return genai.GenerativeModel('gemini-1.5-flash-latest')
+
+    def generate(self, title, category, text, timeout):
+        prompt = REWRITE_PROMPT.format(title=title, category=category, content=text[:4000])
+        response = self.client().generate_content(prompt, request_options={"timeout": timeout})
+        return response.text
+
+class HuggingFaceProvider(RewriteProvider):
+    name = 'HF'
+    url = "https://api-inference.huggingface.co/models/mistralai/Mistral-7B-Instruct-v0.3"
+
+    def configured(self):
+        return bool(HF_API_KEY)
+
+    def make_client(self):
+        import requests
+        session = requests.Session()
+        session.headers["Authorization"] = f"Bearer {HF_API_KEY}"
+        return session
+
+    def generate(self, title, category, text, timeout):
+        payload = {
+            "inputs": REWRITE_PROMPT.format(title=title, category=category, content=text[:3000]),
+            "parameters": {"max_new_tokens": 700, "temperature": 0.7, "do_sample": True}
+        }
+        resp = self.client().post(self.url, json=payload, timeout=timeout)
+        resp.raise_for_status()
+        return resp.json()[0]['generated_text']
+
+class GroqProvider(RewriteProvider):
+    name = 'Groq'
+    concurrency = 4
+
+    def configured(self):
+        return bool(GROQ_API_KEY)
+
+    def make_client(self):
+        from openai import OpenAI
+        return OpenAI(api_key=GROQ_API_KEY, base_url="https://api.groq.com/openai/v1")
+
+    def generate(self, title, category, text, timeout):
+        resp = self.client().chat.completions.create(
+            model="llama-3.1-8b-instant",
+            messages=[{"role": "user", "content": f"""
+                Rewrite this article in your own words for Nigerian readers. Add Naija context if relevant.
+                Tone neutral, interesting. 300–500 words. Title: {title}. Category: {category}.
+                Content: {text[:2000]}
+            """}],
+            max_tokens=600,
+            temperature=0.7,
+            timeout=timeout
+        )
+        return resp.choices[0].message.content
+
+class StubProvider(RewriteProvider):
+    # Local stand-in for tests and benchmarks: REWRITE_STUB=1 replaces the real providers
+    name = 'Stub'
+    concurrency = 8
+    rpm = 0
+
+    def __init__(self, latency=None, rate_limit_ratio=None, retry_after=None):
+        super().__init__()
+        self.latency = float(os.environ.get('REWRITE_STUB_LATENCY', 0.5) if latency is None else latency)
+        self.rate_limit_ratio = float(os.environ.get('REWRITE_STUB_429_RATE', 0) if rate_limit_ratio is None else rate_limit_ratio)
+        self.retry_after = float(os.environ.get('REWRITE_STUB_RETRY_AFTER', 5) if retry_after is None else retry_after)
+        self.rng = random.Random(42)
+
+    def generate(self, title, category, text, timeout):
+        time.sleep(min(self.latency, timeout))
+        if self.rng.random() < self.rate_limit_ratio:
+            raise RateLimited("429 Too Many Requests (stub)", self.retry_after)
+        return f"{title}\n\n" + (text * 3)[:1500].ljust(300, '.')
+
+class RewriteRouter:
+    def __init__(self, providers):
+        self.providers = list(providers)
+
+    def ordered(self):
+        # Untried providers keep their configured priority so they get sampled;
+        # after that the lowest rolling p50 goes first.
+        now = time.monotonic()
+        healthy = [(i, p) for i, p in enumerate(self.providers) if p.available(now)]
+        healthy.sort(key=lambda ip: (ip[1].percentile(0.5) or 0.0, ip[0]))
+        return [p for _, p in healthy]
+
+    def rewrite(self, title, category, text, deadline=REWRITE_DEADLINE):
+        give_up_at = time.monotonic() + deadline
+        tried = set()
+        while True:
+            remaining = give_up_at - time.monotonic()
+            if remaining <= 1:
+                print(f"[REWRITE] deadline of {deadline:.0f}s reached")
+                return None
+            candidates = [p for p in self.ordered() if p.name not in tried]
+            if not candidates:
+                # Wait out a Retry-After if that still fits inside the deadline
+                now = time.monotonic()
+                paused = [p.throttled_until for p in self.providers
+                          if p.name not in tried and p.configured() and now >= p.open_until and p.throttled_until > now]
+                if not paused or min(paused) >= give_up_at - 1:
+                    return None
+                time.sleep(min(paused) - now)
+                continue
+            for provider in candidates:
+                delay = provider.try_acquire()
+                if delay is not None:
+                    break
+            else:
+                # Every healthy provider is at its concurrency limit
+                time.sleep(0.2)
+                continue
+            try:
+                if delay >= remaining - 1:
+                    tried.add(provider.name)
+                    continue
+                time.sleep(delay)
+                started = time.monotonic()
+                print(f"[{provider.name}] Trying...")
+                rewritten = (provider.generate(title, category, text, min(PROVIDER_TIMEOUT, give_up_at - started)) or '').strip()
+                if rewritten and len(rewritten) > 200:
+                    provider.record_success(time.monotonic() - started)
+                    print(f"[{provider.name} SUCCESS] {len(rewritten)} chars")
+                    return rewritten
+                provider.record_failure()
+                tried.add(provider.name)
+                print(f"[{provider.name} FAILED] response too short")
+            except Exception as e:
+                wait_for = retry_after_seconds(e)
+                if wait_for is not None:
+                    provider.throttle(wait_for)
+                else:
+                    provider.record_failure()
+                    tried.add(provider.name)
+                    print(f"[{provider.name} FAILED] {str(e)}")
+            finally:
+                provider.release()
+
+    def configured(self):
+        return [p for p in self.providers if p.configured()]
+
+    def stats(self):
+        return {p.name: p.stats() for p in self.providers}
+
+if os.environ.get('REWRITE_STUB'):
+    rewrite_router = RewriteRouter([StubProvider()])
+else:
+    rewrite_router = RewriteRouter([GeminiProvider(), HuggingFaceProvider(), GroqProvider()])
+
+def rewrite_key(title, full_text):
+    return hashlib.sha256((title + full_text[:1000]).encode()).hexdigest()
+
+def try_rewrite(full_text, title, category, deadline=REWRITE_DEADLINE, count_miss=True):
+    # Queued jobs look again (an earlier run or a duplicate story may have filled the cache since),
+    # but their miss was already counted by build_entry()
+    cache_key = rewrite_key(title, full_text)
+    cached = cached_rewrite(cache_key, count_miss)
     if cached:
         print(f"[CACHE HIT] {title}")
         return cached
@@ -190,766 +966,1725 @@ def rewrite_article(full_text, title, category):
     original_text = full_text.strip()
     print(f"[REWRITE] {title} ({len(original_text)} chars)")
 
-    # 1. Gemini
-    if GEMINI_API_KEY:
-        try:
-            genai.configure(api_key=GEMINI_API_KEY)
-            model = genai.GenerativeModel('gemini-1.5-flash-latest')
-            prompt = f"""
-                Rewrite this article completely in your own words as an original piece for Nigerian readers.
-                Include relevant Naija context, implications, or angles where natural.
-                Keep tone neutral but interesting. Structure: hook intro, main body (short paragraphs), conclusion.
-                Aim for 300–500 words. Do NOT copy original sentences directly.
-                Original title: {title}
-                Category: {category}
-                Content: {original_text[:4000]}
-            """
-            print("[Gemini] Trying...")
-            response = model.generate_content(prompt, request_options={"timeout": 45})
-            rewritten = response.text.strip()
-            if rewritten and len(rewritten) > 200:
-                print(f"[Gemini SUCCESS] {len(rewritten)} chars")
-                cached_rewrite(cache_key)
-                return rewritten
-        except Exception as e:
-            print(f"[Gemini FAILED] {str(e)}")
-
-    # 2. Hugging Face
-    if HF_API_KEY:
-        try:
-            headers = {"Authorization": f"Bearer {HF_API_KEY}"}
-            payload = {
-                "inputs": f"""
-                    Rewrite this article completely in your own words as an original piece for Nigerian readers.
-                    Include relevant Naija context, implications, or angles where natural.
-                    Keep tone neutral but interesting. Structure: hook intro, main body (short paragraphs), conclusion.
-                    Aim for 300–500 words. Do NOT copy original sentences directly.
-                    Original title: {title}
-                    Category: {category}
-                    Content: {original_text[:3000]}
-                """,
-                "parameters": {"max_new_tokens": 700, "temperature": 0.7, "do_sample": True}
-            }
-            print("[HF] Trying...")
-            resp = requests.post(
-                "https://api-inference.huggingface.co/models/mistralai/Mistral-7B-Instruct-v0.3",
-                headers=headers,
-                json=payload,
-                timeout=45
-            )
-            resp.raise_for_status()
-            result = resp.json()
-            rewritten = result[0]['generated_text'].strip()
-            if rewritten and len(rewritten) > 200:
-                print(f"[HF SUCCESS] {len(rewritten)} chars")
-                cached_rewrite(cache_key)
-                return rewritten
-        except Exception as e:
-            print(f"[HF FAILED] {str(e)}")
-
-    # 3. Groq
-    if groq_client:
-        try:
-            print("[Groq] Trying...")
-            resp = groq_client.chat.completions.create(
-                model="llama-3.1-8b-instant",
-                messages=[{"role": "user", "content": f"""
-                    Rewrite this article in your own words for Nigerian readers. Add Naija context if relevant.
-                    Tone neutral, interesting. 300–500 words. Title: {title}. Category: {category}.
-                    Content: {original_text[:2000]}
-                """}],
-                max_tokens=600,
-                temperature=0.7,
-                timeout=45
-            )
-            rewritten = resp.choices[0].message.content.strip()
-            if rewritten and len(rewritten) > 200:
-                print(f"[Groq SUCCESS] {len(rewritten)} chars")
-                cached_rewrite(cache_key)
-                return rewritten
-        except Exception as e:
-            print(f"[Groq FAILED] {str(e)}")
+    with stage('rewrite'):
+        rewritten = rewrite_router.rewrite(title, category, original_text, deadline)
+    if rewritten:
+        store_rewrite(cache_key, rewritten)
+    return rewritten
 
+def rewrite_article(full_text, title, category):
+    rewritten = try_rewrite(full_text, title, category)
+    if rewritten:
+        return rewritten
     print("[FALLBACK] Using original text")
-    return original_text
+    return full_text.strip()
+
+# Rendered-page cache. Entries are tied to the ContentVersion of the scopes they show
+# and expire after PAGE_CACHE_TTL anyway so the "5m ago" labels stay honest.
+PAGE_CACHE_SIZE = int(os.environ.get('PAGE_CACHE_SIZE', 256))
+PAGE_CACHE_TTL = float(os.environ.get('PAGE_CACHE_TTL', 60))
+PAGE_VERSION_TTL = float(os.environ.get('PAGE_VERSION_TTL', 5))
+PageEntry = namedtuple('PageEntry', 'body etag scopes versions rendered_at')
+_page_cache = OrderedDict()
+_page_lock = threading.Lock()
+_versions = {'at': 0.0, 'values': {}}
+
+def content_versions():
+    # One small query at most every PAGE_VERSION_TTL seconds, shared by all requests
+    now = time.monotonic()
+    if now - _versions['at'] > PAGE_VERSION_TTL:
+        try:
+            _versions['values'] = dict(db.session.query(ContentVersion.scope, ContentVersion.version).all())
+        except Exception as ex:
+            db.session.rollback()
+            print(f"[PAGE CACHE] version check failed: {ex}")
+        _versions['at'] = now
+    return _versions['values']
+
+def page_response(body, etag):
+    resp = app.response_class(body, mimetype='text/html')
+    resp.set_etag(etag)
+    resp.headers['Cache-Control'] = f'public, max-age={int(PAGE_CACHE_TTL)}'
+    return resp.make_conditional(request)
+
+def cached_page(key):
+    with _page_lock:
+        entry = _page_cache.get(key)
+    if entry is None:
+        return None
+    versions = content_versions()
+    if (time.monotonic() - entry.rendered_at > PAGE_CACHE_TTL
+            or tuple(versions.get(s, 0) for s in entry.scopes) != entry.versions):
+        with _page_lock:
+            _page_cache.pop(key, None)
+        return None
+    with _page_lock:
+        if key in _page_cache:
+            _page_cache.move_to_end(key)
+    return page_response(entry.body, entry.etag)
+
+def cache_page(key, body, scopes):
+    versions = content_versions()
+    entry = PageEntry(body, hashlib.md5(body.encode()).hexdigest(), tuple(scopes),
+                      tuple(versions.get(s, 0) for s in scopes), time.monotonic())
+    with _page_lock:
+        _page_cache[key] = entry
+        _page_cache.move_to_end(key)
+        while len(_page_cache) > PAGE_CACHE_SIZE:
+            _page_cache.popitem(last=False)
+    return page_response(entry.body, entry.etag)
 
 # Serve static files (including your custom placeholder image)
 @app.route('/static/<path:filename>')
 def serve_static(filename):
+    if request.args.get('v'):
+        # Content-hashed URL from asset_url(): the bytes behind it never change
+        resp = send_from_directory('static', filename, max_age=31536000)
+        resp.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+        return resp
     return send_from_directory('static', filename)
 
+# Image proxy: each publisher image is fetched once, resized to a few fixed widths as WebP and JPEG
+# and kept in a size-capped disk cache, least recently served evicted first. URLs are signed so the
+# proxy only fetches images this site itself linked to.
+IMAGE_CACHE_DIR = os.environ.get('IMAGE_CACHE_DIR') or os.path.join(tempfile.gettempdir(), 'naijabuzz-images')
+IMAGE_CACHE_MAX_BYTES = int(os.environ.get('IMAGE_CACHE_MAX_MB', 500)) * 1024 * 1024
+IMAGE_WIDTHS = (320, 640, 960)
+IMAGE_FORMATS = {'webp': ('WEBP', 'image/webp'), 'jpg': ('JPEG', 'image/jpeg')}
+IMAGE_QUALITY = int(os.environ.get('IMAGE_QUALITY', 72))
+IMAGE_FETCH_TIMEOUT = float(os.environ.get('IMAGE_FETCH_TIMEOUT', 8))
+IMAGE_MAX_SOURCE_BYTES = int(os.environ.get('IMAGE_MAX_SOURCE_MB', 15)) * 1024 * 1024
+IMAGE_RETRY_FAILED = float(os.environ.get('IMAGE_RETRY_FAILED', 3600))
+# The ingestion worker builds variants for new posts so readers rarely wait on a publisher
+IMAGE_WORKERS = int(os.environ.get('IMAGE_WORKERS', 4))
+PLACEHOLDER_IMAGE = 'naijabuzz-placeholder.jpg'
+IMAGE_MAX_REDIRECTS = 3
+# Publisher images only: loopback, private and link-local hosts are refused unless this is set (benchmarks)
+IMAGE_ALLOW_PRIVATE = os.environ.get('IMAGE_ALLOW_PRIVATE') == '1'
+IMAGE_SECRET_RECHECK = 60
+_image_secret = {'key': None, 'at': None}
+_image_files = {'index': None, 'bytes': 0}
+_image_lock = threading.Lock()
+_image_fetch_locks = [threading.Lock() for _ in range(32)]
+
+def stored_secret(name):
+    with app.app_context():
+        try:
+            row = db.session.get(AppSecret, name)
+            if row is None:
+                db.session.add(AppSecret(name=name, value=secrets.token_hex(32)))
+                try:
+                    db.session.commit()
+                except sqlalchemy.exc.IntegrityError:
+                    # Another process created it first; use theirs
+                    db.session.rollback()
+                row = db.session.get(AppSecret, name)
+            return row.value
+        except Exception:
+            db.session.rollback()
+            raise
+
+def image_proxy_secret():
+    # IMAGE_PROXY_SECRET, else a random key shared by all processes through the app_secret table.
+    # None while neither exists (the table is created by init_db): the proxy is off until then.
+    now = time.monotonic()
+    if _image_secret['key'] is None and (_image_secret['at'] is None or now - _image_secret['at'] > IMAGE_SECRET_RECHECK):
+        _image_secret['at'] = now
+        try:
+            _image_secret['key'] = (os.environ.get('IMAGE_PROXY_SECRET') or stored_secret('image-proxy')).encode()
+        except Exception as ex:
+            print(f"[IMAGE] No proxy secret yet, linking publisher images directly: {str(ex)[:120]}")
+    return _image_secret['key']
+
+def image_signature(src, key):
+    return hmac.new(key, src.encode(), hashlib.sha256).hexdigest()[:20]
+
+def image_url(src, width, fmt='jpg'):
+    # Local files (the placeholder, anything under /static) are served as they are
+    if not src or not src.startswith(('http://', 'https://')):
+        return src
+    key = image_proxy_secret()
+    if key is None:
+        return src
+    width = min((w for w in IMAGE_WIDTHS if w >= width), default=IMAGE_WIDTHS[-1])
+    return f"/img/{width}.{fmt}?u={urllib.parse.quote(src, safe='')}&s={image_signature(src, key)}"
+
+def image_path(key, suffix):
+    return os.path.join(IMAGE_CACHE_DIR, key[:2], f"{key}{suffix}")
+
+def image_index():
+    # path -> size, oldest first. Built from the directory once per process, then kept in memory.
+    with _image_lock:
+        if _image_files['index'] is None:
+            found = []
+            for root, _, names in os.walk(IMAGE_CACHE_DIR):
+                for name in names:
+                    path = os.path.join(root, name)
+                    try:
+                        st = os.stat(path)
+                    except OSError:
+                        continue
+                    found.append((st.st_mtime, path, st.st_size))
+            _image_files['index'] = OrderedDict((path, size) for _, path, size in sorted(found))
+            _image_files['bytes'] = sum(size for _, _, size in found)
+        return _image_files['index']
+
+def remember_image(path, size):
+    index = image_index()
+    evicted = []
+    with _image_lock:
+        _image_files['bytes'] += size - index.pop(path, 0)
+        index[path] = size
+        while _image_files['bytes'] > IMAGE_CACHE_MAX_BYTES and len(index) > 1:
+            old, old_size = index.popitem(last=False)
+            _image_files['bytes'] -= old_size
+            evicted.append(old)
+    for old in evicted:
+        try:
+            os.remove(old)
+        except OSError:
+            pass
+    if evicted:
+        print(f"[IMAGE] Evicted {len(evicted)} cached files, {_image_files['bytes'] // 1024} KB in cache")
+
+def touch_image(path):
+    index = image_index()
+    with _image_lock:
+        known = path in index
+        if known:
+            index.move_to_end(path)
+    if not known:
+        # Written by another process (the ingestion worker) after this one built its index
+        try:
+            remember_image(path, os.path.getsize(path))
+        except OSError:
+            pass
+    try:
+        # mtime doubles as "last served" so the order survives a restart
+        os.utime(path)
+    except OSError:
+        pass
+
+def write_image_file(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, 'wb') as f:
+        f.write(data)
+    os.replace(tmp, path)
+    remember_image(path, len(data))
+
+def public_url(url):
+    parts = urllib.parse.urlsplit(url)
+    if parts.scheme not in ('http', 'https') or not parts.hostname:
+        return False
+    if IMAGE_ALLOW_PRIVATE:
+        return True
+    try:
+        infos = socket.getaddrinfo(parts.hostname, parts.port or (443 if parts.scheme == 'https' else 80),
+                                   proto=socket.IPPROTO_TCP)
+    except (socket.gaierror, UnicodeError, ValueError):
+        return False
+    return all(ipaddress.ip_address(info[4][0].split('%')[0]).is_global for info in infos)
+
+def fetch_image_source(src):
+    # Redirects are followed by hand so every hop gets the same public-address check
+    import requests
+    url = src
+    for _ in range(IMAGE_MAX_REDIRECTS + 1):
+        if not public_url(url):
+            raise ValueError(f"refusing non-public address {url[:100]}")
+        resp = requests.get(url, headers=HTTP_HEADERS, timeout=IMAGE_FETCH_TIMEOUT, stream=True, allow_redirects=False)
+        if not resp.is_redirect:
+            break
+        url = urllib.parse.urljoin(url, resp.headers['Location'])
+        resp.close()
+    else:
+        raise ValueError(f"more than {IMAGE_MAX_REDIRECTS} redirects")
+    resp.raise_for_status()
+    data = bytearray()
+    for chunk in resp.iter_content(65536):
+        data += chunk
+        if len(data) > IMAGE_MAX_SOURCE_BYTES:
+            raise ValueError(f"image larger than {IMAGE_MAX_SOURCE_BYTES // (1024 * 1024)} MB")
+    return bytes(data)
+
+def build_image_variants(src, key):
+    # Every width x format at once, so the original is downloaded and decoded a single time
+    from PIL import Image, ImageOps
+    img = Image.open(io.BytesIO(fetch_image_source(src)))
+    # JPEGs decode straight at a reduced scale when the original is much bigger than we need
+    img.draft('RGB', (IMAGE_WIDTHS[-1], IMAGE_WIDTHS[-1]))
+    img = ImageOps.exif_transpose(img)
+    if img.mode in ('RGBA', 'LA', 'P'):
+        img = img.convert('RGBA')
+        flat = Image.new('RGB', img.size, 'white')
+        flat.paste(img, mask=img.getchannel('A'))
+        img = flat
+    elif img.mode != 'RGB':
+        img = img.convert('RGB')
+    for width in sorted(IMAGE_WIDTHS, reverse=True):
+        img.thumbnail((width, width * 3), Image.LANCZOS)
+        for fmt, (pil_format, _) in IMAGE_FORMATS.items():
+            buf = io.BytesIO()
+            img.save(buf, pil_format, quality=IMAGE_QUALITY, **({'method': 4} if fmt == 'webp' else {'optimize': True, 'progressive': True}))
+            write_image_file(image_path(key, f"-{width}.{fmt}"), buf.getvalue())
+
+def recently_failed(key):
+    try:
+        return time.time() - os.path.getmtime(image_path(key, '.failed')) < IMAGE_RETRY_FAILED
+    except OSError:
+        return False
+
+def image_key(src):
+    return hashlib.sha256(src.encode()).hexdigest()[:32]
+
+def cache_image(src, path=None):
+    """Build all variants of src unless `path` (default: the last variant written) is cached
+    already or the source failed recently. One build per image at a time."""
+    key = image_key(src)
+    path = path or image_path(key, f"-{IMAGE_WIDTHS[0]}.{list(IMAGE_FORMATS)[-1]}")
+    if os.path.exists(path) or recently_failed(key):
+        return
+    with _image_fetch_locks[int(key[:4], 16) % len(_image_fetch_locks)]:
+        if os.path.exists(path) or recently_failed(key):
+            return
+        started = time.monotonic()
+        try:
+            build_image_variants(src, key)
+            print(f"[IMAGE] Cached {src[:100]} in {time.monotonic() - started:.2f}s")
+        except Exception as ex:
+            print(f"[IMAGE] {src[:100]} failed: {str(ex)[:120]}")
+            write_image_file(image_path(key, '.failed'), b'')
+
+def prefetch_image(src):
+    # Ingestion side: same politeness as feed and article fetches
+    with host_slot(src), stage('image'):
+        cache_image(src)
+
+@app.route('/img/<int:width>.<any(webp, jpg):fmt>')
+def image_proxy(width, fmt):
+    src = request.args.get('u', '')
+    key = image_proxy_secret()
+    if (width not in IMAGE_WIDTHS or not src or key is None
+            or not hmac.compare_digest(request.args.get('s', ''), image_signature(src, key))):
+        abort(404)
+    path = image_path(image_key(src), f"-{width}.{fmt}")
+    # Normally built by the ingestion worker already; this is the fallback for misses and evictions
+    cache_image(src, path)
+    try:
+        resp = send_file(path, mimetype=IMAGE_FORMATS[fmt][1], max_age=31536000)
+    except FileNotFoundError:
+        # Fetch failed (or the file was just evicted): placeholder, cached briefly so we retry later
+        return send_from_directory('static', PLACEHOLDER_IMAGE, max_age=int(IMAGE_RETRY_FAILED))
+    touch_image(path)
+    resp.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+    return resp
+
+# Sitemaps: an index plus child sitemaps of up to 50k posts each (split by id range).
+# Each one is streamed on first request, kept gzipped in memory and reused until the next ingest.
+SITE_URL = 'https://naijabuzz.com'
+SITEMAP_CHUNK = 50000
+SitemapEntry = namedtuple('SitemapEntry', 'version gzipped last_modified')
+_sitemap_cache = {}
+
+def sitemap_state():
+    row = db.session.get(ContentVersion, 'all')
+    if row is None:
+        return 0, datetime.now(timezone.utc).replace(microsecond=0)
+    return row.version, as_utc(row.updated_at).replace(microsecond=0)
+
+def sitemap_response(name, generate):
+    version, last_modified = sitemap_state()
+    entry = _sitemap_cache.get(name)
+    if entry is not None and entry.version != version:
+        entry = None
+    if entry is not None:
+        last_modified = entry.last_modified
+    if request.if_modified_since and last_modified <= request.if_modified_since:
+        resp = app.response_class(status=304)
+    elif entry is not None:
+        if 'gzip' in request.headers.get('Accept-Encoding', ''):
+            resp = app.response_class(entry.gzipped, mimetype='application/xml')
+            resp.headers['Content-Encoding'] = 'gzip'
+        else:
+            resp = app.response_class(gzip.decompress(entry.gzipped), mimetype='application/xml')
+    else:
+        def stream():
+            compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+            parts = []
+            for chunk in generate():
+                data = chunk.encode()
+                parts.append(compressor.compress(data))
+                yield data
+            parts.append(compressor.flush())
+            _sitemap_cache[name] = SitemapEntry(version, b''.join(parts), last_modified)
+        resp = app.response_class(stream_with_context(stream()), mimetype='application/xml')
+    resp.last_modified = last_modified
+    resp.headers['Vary'] = 'Accept-Encoding'
+    return resp
+
+def sitemap_url(loc, lastmod, changefreq, priority):
+    return (f'  <url>\n    <loc>{loc}</loc>\n    <lastmod>{lastmod}</lastmod>\n'
+            f'    <changefreq>{changefreq}</changefreq>\n    <priority>{priority}</priority>\n  </url>\n')
+
 @app.route('/sitemap.xml')
 def dynamic_sitemap():
-    # Get the most recent articles (limit to 1000 - adjust as needed)
-    posts = Post.query.order_by(Post.pub_date.desc()).limit(1000).all()
-
-    xml = '<?xml version="1.0" encoding="UTF-8"?>\n'
-    xml += '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
-
-    # Homepage
-    xml += '  <url>\n'
-    xml += '    <loc>https://naijabuzz.com/</loc>\n'
-    xml += f'    <lastmod>{datetime.now(timezone.utc).strftime("%Y-%m-%d")}</lastmod>\n'
-    xml += '    <changefreq>hourly</changefreq>\n'
-    xml += '    <priority>1.0</priority>\n'
-    xml += '  </url>\n'
-
-    # Category pages
-    for cat_key in CATEGORIES:
-        if cat_key != 'all':
-            xml += '  <url>\n'
-            xml += f'    <loc>https://naijabuzz.com/?cat={urllib.parse.quote(cat_key)}</loc>\n'
-            xml += f'    <lastmod>{datetime.now(timezone.utc).strftime("%Y-%m-%d")}</lastmod>\n'
-            xml += '    <changefreq>daily</changefreq>\n'
-            xml += '    <priority>0.8</priority>\n'
-            xml += '  </url>\n'
-
-    # All articles from database
-    for post in posts:
-        lastmod = post.pub_date.strftime('%Y-%m-%d') if post.pub_date else datetime.now(timezone.utc).strftime('%Y-%m-%d')
-        xml += '  <url>\n'
-        xml += f'    <loc>https://naijabuzz.com/{post.slug}</loc>\n'
-        xml += f'    <lastmod>{lastmod}</lastmod>\n'
-        xml += '    <changefreq>weekly</changefreq>\n'
-        xml += '    <priority>0.9</priority>\n'
-        xml += '  </url>\n'
-
-    xml += '</urlset>'
-
-    return xml, 200, {'Content-Type': 'application/xml'}
+    def generate():
+        max_id = db.session.query(sqlalchemy.func.max(Post.id)).scalar() or 0
+        today = datetime.now(timezone.utc).strftime('%Y-%m-%d')
+        yield '<?xml version="1.0" encoding="UTF-8"?>\n'
+        yield '<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+        children = ['sitemap-pages.xml'] + [f'sitemap-posts-{n}.xml' for n in range(1, max_id // SITEMAP_CHUNK + 2)]
+        for child in children:
+            yield f'  <sitemap>\n    <loc>{SITE_URL}/{child}</loc>\n    <lastmod>{today}</lastmod>\n  </sitemap>\n'
+        yield '</sitemapindex>'
+    return sitemap_response('index', generate)
+
+@app.route('/sitemap-pages.xml')
+def sitemap_pages():
+    def generate():
+        today = datetime.now(timezone.utc).strftime('%Y-%m-%d')
+        yield '<?xml version="1.0" encoding="UTF-8"?>\n'
+        yield '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+        # Homepage
+        yield sitemap_url(f'{SITE_URL}/', today, 'hourly', '1.0')
+        # Category pages
+        for cat_key in CATEGORIES:
+            if cat_key != 'all':
+                yield sitemap_url(f'{SITE_URL}/?cat={urllib.parse.quote(cat_key)}', today, 'daily', '0.8')
+        yield '</urlset>'
+    return sitemap_response('pages', generate)
+
+@app.route('/sitemap-posts-<int:n>.xml')
+def sitemap_posts(n):
+    max_id = db.session.query(sqlalchemy.func.max(Post.id)).scalar() or 0
+    if n < 1 or n > max_id // SITEMAP_CHUNK + 1:
+        abort(404)
+
+    def generate():
+        yield '<?xml version="1.0" encoding="UTF-8"?>\n'
+        yield '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+        rows = (db.session.query(Post.slug, Post.pub_date)
+                .filter(Post.id > (n - 1) * SITEMAP_CHUNK, Post.id <= n * SITEMAP_CHUNK)
+                .order_by(Post.id).yield_per(2000))
+        today = datetime.now(timezone.utc).strftime('%Y-%m-%d')
+        batch = []
+        for slug, pub_date in rows:
+            lastmod = pub_date.strftime('%Y-%m-%d') if pub_date else today
+            batch.append(sitemap_url(f'{SITE_URL}/{slug}', lastmod, 'weekly', '0.9'))
+            if len(batch) == 500:
+                yield ''.join(batch)
+                batch = []
+        yield ''.join(batch) + '</urlset>'
+    return sitemap_response(f'posts-{n}', generate)
 
 @app.route('/robots.txt')
 def serve_robots():
     return send_from_directory('.', 'robots.txt')
 
-@app.route('/')
-def index():
-    init_db()
-    selected = request.args.get('cat', 'all').lower()
-    page = max(1, int(request.args.get('page', 1)))
-    per_page = 20
+# Page templates are compiled once at import; their CSS is served from /static with a content hash
+INDEX_TEMPLATE = """
+<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>{{ page_title }}</title>
+    <meta name="description" content="{{ page_desc }}">
+    <meta name="robots" content="index, follow">
+    <link rel="canonical" href="https://naijabuzz.com/?cat={{ selected if selected != 'all' else '' }}">
+    <meta property="og:title" content="{{ page_title }}">
+    <meta property="og:description" content="{{ page_desc }}">
+    <meta property="og:image" content="{{ featured_img }}">
+    <meta property="og:url" content="https://naijabuzz.com">
+    <meta property="og:type" content="website">
+    <meta name="twitter:card" content="summary_large_image">
+    <link href="https://fonts.googleapis.com/css2?family=Inter:wght@300;400;500;600;700;900&family=Playfair+Display:wght@700&display=swap" rel="stylesheet">
+    <link rel="stylesheet" href="{{ asset_url('css/home.css') }}">
+</head>
+<body>
+    <header>
+        <div class="header-inner">
+            <h1><a href="/" style="color:white;text-decoration:none;">NaijaBuzz</a></h1>
+            <div class="tagline">Your Daily Dose of Fresh Nigerian & Global News</div>
+            <form class="search-form" action="/search" method="get" role="search">
+                <input type="search" name="q" placeholder="Search NaijaBuzz" aria-label="Search">
+                <button type="submit">Search</button>
+            </form>
+        </div>
 
-    query = Post.query.order_by(Post.pub_date.desc())
-    if selected != 'all':
-        query = query.filter(Post.category.ilike(f"%{selected}%"))
-
-    posts = query.offset((page - 1) * per_page).limit(per_page + 1).all()
-    has_next = len(posts) > per_page
-    if has_next:
-        posts = posts[:-1]
-
-    def ago(dt):
-        if not dt: return "Just now"
-        if dt.tzinfo is None: dt = dt.replace(tzinfo=timezone.utc)
-        diff = datetime.now(timezone.utc) - dt
-        if diff < timedelta(minutes=60): return f"{int(diff.total_seconds()//60)}m ago"
-        if diff < timedelta(hours=24): return f"{int(diff.total_seconds()//3600)}h ago"
-        if diff < timedelta(days=7): return f"{diff.days}d ago"
-        return dt.strftime("%b %d")
+        <nav class="tabs-container">
+            <div class="tabs">
+                {% for key, name in categories.items() %}
+                <a href="/?cat={{ key }}" class="tab {{ 'active' if selected == key else '' }}">{{ name }}</a>
+                {% endfor %}
+            </div>
+        </nav>
+    </header>
 
-    page_title = f"{CATEGORIES.get(selected, 'All News')} - NaijaBuzz"
-    page_desc = "Latest Nigerian news, football, gossip, entertainment, tech & world updates - refreshed frequently!"
-    featured_img = posts[0].image if posts else "/static/img/naijabuzz-placeholder.jpg"
+    <div class="container">
+        <div class="grid">
+            {% if posts %}
+                {% for p in posts %}
+                <div class="card">
+                    <div class="img-container">
+                        <picture>
+                            <source type="image/webp" srcset="{{ image_url(p.image, 640, 'webp') }}">
+                            <img loading="lazy" src="{{ image_url(p.image, 640) }}" alt="{{ p.title }}">
+                        </picture>
+                    </div>
+                    <div class="content">
+                        <span class="category-badge">{{ p.category }}</span>
+                        <h2><a href="/{{ p.slug }}">{{ p.title }}</a></h2>
+                        <div class="meta">{{ ago(p.pub_date) }}</div>
+                        <p>{{ p.excerpt|safe }}</p>
+                        <a href="/{{ p.slug }}" class="readmore">Read Full Story →</a>
+                    </div>
+                </div>
+                {% endfor %}
+            {% else %}
+                <div style="grid-column:1/-1;text-align:center;padding:6rem 1rem;">
+                    <p style="font-size:1.6rem;color:var(--primary);font-weight:600;">
+                        No stories yet — content refreshes every 15 minutes!
+                    </p>
+                </div>
+            {% endif %}
+        </div>
+
+        <div class="pagination">
+            {% if has_prev %}
+            <a href="/?cat={{ selected }}{% if page > 2 %}&page={{ page-1 }}&before={{ prev_cursor }}{% endif %}" class="page-link">← Previous</a>
+            {% endif %}
+            <span class="page-link active">Page {{ page }}</span>
+            {% if has_next %}
+            <a href="/?cat={{ selected }}&page={{ page+1 }}&after={{ next_cursor }}" class="page-link">Next →</a>
+            {% endif %}
+        </div>
+    </div>
 
-    html = """
-    <!DOCTYPE html>
-    <html lang="en">
-    <head>
-        <meta charset="UTF-8">
-        <meta name="viewport" content="width=device-width, initial-scale=1.0">
-        <title>{{ page_title }}</title>
-        <meta name="description" content="{{ page_desc }}">
-        <meta name="robots" content="index, follow">
-        <link rel="canonical" href="https://naijabuzz.com/?cat={{ selected if selected != 'all' else '' }}">
-        <meta property="og:title" content="{{ page_title }}">
-        <meta property="og:description" content="{{ page_desc }}">
-        <meta property="og:image" content="{{ featured_img }}">
-        <meta property="og:url" content="https://naijabuzz.com">
-        <meta property="og:type" content="website">
-        <meta name="twitter:card" content="summary_large_image">
-        <link href="https://fonts.googleapis.com/css2?family=Inter:wght@300;400;500;600;700;900&family=Playfair+Display:wght@700&display=swap" rel="stylesheet">
-        <style>
-            :root {
-                --primary: #0066cc;
-                --primary-dark: #004080;
-                --accent: #ff6b35;
-                --dark: #0f172a;
-                --light: #f8fafc;
-                --gray: #64748b;
-                --border: #e2e8f0;
-            }
-            * { box-sizing: border-box; margin: 0; padding: 0; }
-            body {
-                font-family: 'Inter', system-ui, sans-serif;
-                background: var(--light);
-                color: #1e293b;
-                line-height: 1.7;
-                font-size: 1.05rem;
-            }
-            header {
-                background: linear-gradient(135deg, var(--dark) 0%, #1e293b 100%);
-                color: white;
-                position: sticky;
-                top: 0;
-                z-index: 1000;
-                box-shadow: 0 2px 10px rgba(0,0,0,0.15);
-                padding: 1rem 0;
-            }
-            .header-inner {
-                text-align: center;
-                padding: 0 1rem;
-            }
-            h1 {
-                font-family: 'Playfair Display', serif;
-                font-size: 2.8rem;
-                font-weight: 700;
-                margin: 0;
-                letter-spacing: -1px;
-            }
-            .tagline {
-                font-size: 1.2rem;
-                opacity: 0.9;
-                margin-top: 0.4rem;
-            }
-            .tabs-container {
-                background: white;
-                padding: 0.8rem 0;
-                overflow-x: auto;
-                border-bottom: 1px solid var(--border);
-            }
-            .tabs {
-                display: flex;
-                gap: 0.7rem;
-                padding: 0 1rem;
-                white-space: nowrap;
-                justify-content: flex-start;
-            }
-            .tab {
-                padding: 0.6rem 1.3rem;
-                background: #f1f5f9;
-                color: #475569;
-                border-radius: 9999px;
-                font-weight: 600;
-                font-size: 0.95rem;
-                text-decoration: none;
-                transition: all 0.3s ease;
-                flex-shrink: 0;
-            }
-            .tab:hover, .tab.active {
-                background: var(--primary);
-                color: white;
-            }
-            .container {
-                max-width: 1440px;
-                margin: 2rem auto;
-                padding: 0 1rem;
-            }
-            .grid {
-                display: grid;
-                grid-template-columns: repeat(4, 1fr);
-                gap: 1.8rem;
-            }
-            .card {
-                background: white;
-                border-radius: 1rem;
-                overflow: hidden;
-                box-shadow: 0 4px 16px rgba(0,0,0,0.08);
-                transition: all 0.3s ease;
-                border: 1px solid var(--border);
-            }
-            .card:hover {
-                transform: translateY(-6px);
-                box-shadow: 0 16px 32px rgba(0,0,0,0.12);
-            }
-            .img-container {
-                height: 220px;
-                background: #0f172a;
-                overflow: hidden;
-            }
-            .card img {
-                width: 100%;
-                height: 100%;
-                object-fit: cover;
-                transition: transform 0.5s ease;
-            }
-            .card:hover img { transform: scale(1.06); }
-            .content { padding: 1.3rem; }
-            .category-badge {
-                display: inline-block;
-                background: var(--primary);
-                color: white;
-                padding: 0.3rem 0.8rem;
-                border-radius: 9999px;
-                font-size: 0.75rem;
-                font-weight: 600;
-                margin-bottom: 0.6rem;
-            }
-            .card h2 { font-size: 1.3rem; line-height: 1.4; margin-bottom: 0.6rem; font-weight: 700; }
-            .card h2 a { color: #0f172a; text-decoration: none; }
-            .card h2 a:hover { color: var(--primary); }
-            .meta { font-size: 0.85rem; color: var(--gray); margin-bottom: 0.7rem; }
-            .card p { color: #475569; font-size: 0.98rem; line-height: 1.6; margin-bottom: 1rem; }
-            .readmore {
-                background: var(--primary);
-                color: white;
-                padding: 0.7rem 1.5rem;
-                border-radius: 9999px;
-                text-decoration: none;
-                font-weight: 700;
-                font-size: 0.95rem;
-                display: inline-block;
-                transition: all 0.3s;
-            }
-            .readmore:hover { background: var(--primary-dark); }
-            .pagination { display: flex; justify-content: center; gap: 0.8rem; margin: 3rem 0; flex-wrap: wrap; }
-            .page-link { padding: 0.7rem 1.4rem; background: #f1f5f9; color: #475569; border-radius: 9999px; text-decoration: none; font-weight: 600; transition: all 0.3s; }
-            .page-link:hover, .page-link.active { background: var(--primary); color: white; }
-            footer { text-align: center; padding: 3rem 1rem; background: var(--dark); color: #94a3b8; font-size: 0.9rem; }
-            footer a { color: var(--primary); text-decoration: none; }
-            @media (max-width: 1024px) { .grid { grid-template-columns: repeat(3, 1fr); } }
-            @media (max-width: 768px) {
-                header { padding: 0.8rem 0; }
-                h1 { font-size: 2.4rem; margin: 0; }
-                .tagline { font-size: 1rem; margin-top: 0.3rem; }
-                .tabs { padding: 0.5rem 0.3rem; gap: 0.5rem; overflow-x: auto; justify-content: flex-start; }
-                .tab { padding: 0.5rem 1.1rem; font-size: 0.9rem; }
-                .grid { grid-template-columns: 1fr; gap: 1.2rem; }
-                .container { margin: 1.5rem auto; padding: 0 0.8rem; }
-                .img-container { height: 200px; }
-            }
-            @media (max-width: 480px) {
-                .grid { grid-template-columns: 1fr; }
-                h1 { font-size: 2.1rem; }
-            }
-        </style>
-    </head>
-    <body>
-        <header>
-            <div class="header-inner">
-                <h1><a href="/" style="color:white;text-decoration:none;">NaijaBuzz</a></h1>
-                <div class="tagline">Your Daily Dose of Fresh Nigerian & Global News</div>
+    <footer>
+        © 2026 <a href="/">NaijaBuzz</a> • All rights reserved • Auto-refreshed every 15 minutes
+    </footer>
+</body>
+</html>
+"""
+
+POST_TEMPLATE = """
+<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>{{ page_title }}</title>
+    <meta name="description" content="{{ page_desc }}">
+    <meta name="robots" content="index, follow">
+    <link rel="canonical" href="https://naijabuzz.com/{{ post.slug }}">
+    <meta property="og:title" content="{{ page_title }}">
+    <meta property="og:description" content="{{ page_desc }}">
+    <meta property="og:image" content="{{ featured_img }}">
+    <meta property="og:url" content="https://naijabuzz.com/{{ post.slug }}">
+    <meta property="og:type" content="article">
+    <meta name="twitter:card" content="summary_large_image">
+    <link href="https://fonts.googleapis.com/css2?family=Inter:wght@300;400;500;600;700;900&family=Playfair+Display:wght@700&display=swap" rel="stylesheet">
+    <link rel="stylesheet" href="{{ asset_url('css/article.css') }}">
+</head>
+<body>
+    <header>
+        <div class="header-inner">
+            <h1><a href="/" style="color:white;text-decoration:none;">NaijaBuzz</a></h1>
+        </div>
+
+        <nav class="tabs-container">
+            <div class="tabs">
+                {% for key, name in categories.items() %}
+                <a href="/?cat={{ key }}" class="tab {{ 'active' if selected == key else '' }}">{{ name }}</a>
+                {% endfor %}
             </div>
+        </nav>
+    </header>
 
-            <nav class="tabs-container">
-                <div class="tabs">
-                    {% for key, name in categories.items() %}
-                    <a href="/?cat={{ key }}" class="tab {{ 'active' if selected == key else '' }}">{{ name }}</a>
-                    {% endfor %}
-                </div>
-            </nav>
-        </header>
-
-        <div class="container">
-            <div class="grid">
-                {% if posts %}
-                    {% for p in posts %}
-                    <div class="card">
-                        <div class="img-container">
-                            <img loading="lazy" src="{{ p.image }}" alt="{{ p.title }}">
-                        </div>
-                        <div class="content">
-                            <span class="category-badge">{{ p.category }}</span>
-                            <h2><a href="/{{ p.slug }}">{{ p.title }}</a></h2>
-                            <div class="meta">{{ ago(p.pub_date) }}</div>
-                            <p>{{ p.excerpt|safe }}</p>
-                            <a href="/{{ p.slug }}" class="readmore">Read Full Story →</a>
-                        </div>
+    <div class="single-container">
+        <div class="single-meta">{{ post.category }} • {{ ago(post.pub_date, '%b %d, %Y') }}</div>
+        <h1>{{ post.title }}</h1>
+        <picture>
+            <source type="image/webp" srcset="{{ image_url(featured_img, 960, 'webp') }}">
+            <img loading="lazy" src="{{ image_url(featured_img, 960) }}" alt="{{ post.title }}" class="single-img">
+        </picture>
+        <div class="single-content">{{ post.full_content | safe }}</div>
+        <div class="source">Source: <a href="{{ post.link }}" target="_blank" rel="noopener nofollow">Original Article</a> • AI-enhanced version for clarity & Nigerian context</div>
+
+        <div class="related">
+            <h2>Related Stories</h2>
+            <div class="related-grid">
+                {% for r in related %}
+                <div class="card">
+                    <div class="img-container">
+                        <picture>
+                            <source type="image/webp" srcset="{{ image_url(r.image, 320, 'webp') }}">
+                            <img loading="lazy" src="{{ image_url(r.image, 320) }}" alt="{{ r.title }}">
+                        </picture>
                     </div>
-                    {% endfor %}
-                {% else %}
-                    <div style="grid-column:1/-1;text-align:center;padding:6rem 1rem;">
-                        <p style="font-size:1.6rem;color:var(--primary);font-weight:600;">
-                            No stories yet — content refreshes every 15 minutes!
-                        </p>
+                    <div class="content">
+                        <h2><a href="/{{ r.slug }}">{{ r.title }}</a></h2>
+                        <div class="meta">{{ r.category }} • {{ ago(r.pub_date, '%b %d, %Y') }}</div>
                     </div>
-                {% endif %}
+                </div>
+                {% endfor %}
             </div>
+        </div>
+    </div>
+
+    <footer>
+        © 2026 <a href="/">NaijaBuzz</a> • All rights reserved • Auto-refreshed every 15 minutes
+    </footer>
+</body>
+</html>
+"""
 
-            <div class="pagination">
-                {% if page > 1 %}
-                <a href="/?cat={{ selected }}&page={{ page-1 }}" class="page-link">← Previous</a>
-                {% endif %}
-                <span class="page-link active">Page {{ page }}</span>
-                {% if has_next %}
-                <a href="/?cat={{ selected }}&page={{ page+1 }}" class="page-link">Next →</a>
-                {% endif %}
+SEARCH_TEMPLATE = """
+<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>{{ page_title }}</title>
+    <meta name="robots" content="noindex, follow">
+    <link href="https://fonts.googleapis.com/css2?family=Inter:wght@300;400;500;600;700;900&family=Playfair+Display:wght@700&display=swap" rel="stylesheet">
+    <link rel="stylesheet" href="{{ asset_url('css/home.css') }}">
+</head>
+<body>
+    <header>
+        <div class="header-inner">
+            <h1><a href="/" style="color:white;text-decoration:none;">NaijaBuzz</a></h1>
+            <form class="search-form" action="/search" method="get" role="search">
+                <input type="search" name="q" value="{{ q }}" placeholder="Search NaijaBuzz" aria-label="Search" autofocus>
+                <button type="submit">Search</button>
+            </form>
+        </div>
+
+        <nav class="tabs-container">
+            <div class="tabs">
+                {% for key, name in categories.items() %}
+                <a href="/?cat={{ key }}" class="tab">{{ name }}</a>
+                {% endfor %}
             </div>
+        </nav>
+    </header>
+
+    <div class="container">
+        {% if failed %}
+        <p class="search-status">Search is busy right now. Please try again in a moment.</p>
+        {% elif q and not results %}
+        <p class="search-status">No stories match "{{ q }}".</p>
+        {% endif %}
+        <div class="grid">
+            {% for r in results %}
+            <div class="card">
+                <div class="img-container">
+                    <picture>
+                        <source type="image/webp" srcset="{{ image_url(r.image, 640, 'webp') }}">
+                        <img loading="lazy" src="{{ image_url(r.image, 640) }}" alt="{{ r.title }}">
+                    </picture>
+                </div>
+                <div class="content">
+                    <span class="category-badge">{{ r.category }}</span>
+                    <h2><a href="/{{ r.slug }}">{{ r.title_html|safe }}</a></h2>
+                    <div class="meta">{{ ago(r.pub_date) }}</div>
+                    <p>{{ r.snippet_html|safe }}</p>
+                    <a href="/{{ r.slug }}" class="readmore">Read Full Story →</a>
+                </div>
+            </div>
+            {% endfor %}
+        </div>
+
+        {% if has_prev or has_next %}
+        <div class="pagination">
+            {% if has_prev %}
+            <a href="/search?q={{ q|urlencode }}&page={{ page-1 }}" class="page-link">← Previous</a>
+            {% endif %}
+            <span class="page-link active">Page {{ page }}</span>
+            {% if has_next %}
+            <a href="/search?q={{ q|urlencode }}&page={{ page+1 }}" class="page-link">Next →</a>
+            {% endif %}
         </div>
+        {% endif %}
+    </div>
+
+    <footer>
+        © 2026 <a href="/">NaijaBuzz</a> • All rights reserved • Auto-refreshed every 15 minutes
+    </footer>
+</body>
+</html>
+"""
+
+def asset_url(filename):
+    return f"/static/{filename}?v={asset_hash(filename)}"
+
+@lru_cache(maxsize=None)
+def asset_hash(filename):
+    with open(os.path.join(app.root_path, 'static', filename), 'rb') as f:
+        return hashlib.md5(f.read()).hexdigest()[:10]
+
+def ago(dt, older="%b %d"):
+    if not dt: return "Just now"
+    if dt.tzinfo is None: dt = dt.replace(tzinfo=timezone.utc)
+    diff = datetime.now(timezone.utc) - dt
+    if diff < timedelta(minutes=60): return f"{int(diff.total_seconds()//60)}m ago"
+    if diff < timedelta(hours=24): return f"{int(diff.total_seconds()//3600)}h ago"
+    if diff < timedelta(days=7): return f"{diff.days}d ago"
+    return dt.strftime(older)
+
+app.jinja_env.globals['asset_url'] = asset_url
+app.jinja_env.globals['ago'] = ago
+app.jinja_env.globals['image_url'] = image_url
+index_template = app.jinja_env.from_string(INDEX_TEMPLATE)
+post_template = app.jinja_env.from_string(POST_TEMPLATE)
+search_template = app.jinja_env.from_string(SEARCH_TEMPLATE)
+
+# Keyset pagination on (pub_date, id): a cursor is the sort key of the last/first row shown,
+# so deep pages cost an index seek instead of an OFFSET scan
+def encode_cursor(post):
+    dt = as_utc(post.pub_date).replace(tzinfo=None)
+    return f"{dt.strftime('%Y%m%d%H%M%S%f')}-{post.id}"
+
+def decode_cursor(value):
+    if not value:
+        return None
+    try:
+        stamp, post_id = value.split('-', 1)
+        return datetime.strptime(stamp, '%Y%m%d%H%M%S%f'), int(post_id)
+    except ValueError:
+        return None
+
+# Cards (listings, related stories) only need these columns; rows come back as plain tuples
+PostCard = namedtuple('PostCard', 'id title slug image excerpt category category_key pub_date')
+CARD_COLUMNS = [Post.id, Post.title, Post.slug, Post.image, Post.excerpt, Post.category, Post.category_key, Post.pub_date]
+
+def card_query():
+    return db.session.query(*CARD_COLUMNS)
+
+def as_cards(rows):
+    return [PostCard._make(row) for row in rows]
 
-        <footer>
-            © 2026 <a href="/">NaijaBuzz</a> • All rights reserved • Auto-refreshed every 15 minutes
-        </footer>
-    </body>
-    </html>
-    """
-    return render_template_string(html, posts=posts, categories=CATEGORIES, selected=selected,
-                                  ago=ago, page=page, has_next=has_next, page_title=page_title, page_desc=page_desc, featured_img=featured_img)
+def fetch_listing(selected, per_page, page=1, after=None, before=None):
+    query = card_query()
+    if selected != 'all':
+        query = query.filter(Post.category_key == selected)
+    sort_key = sqlalchemy.tuple_(Post.pub_date, Post.id)
+    if before:
+        rows = (query.filter(sort_key > before)
+                .order_by(Post.pub_date.asc(), Post.id.asc()).limit(per_page + 1).all())
+        return as_cards(rows[:per_page][::-1]), len(rows) > per_page, True
+    query = query.order_by(Post.pub_date.desc(), Post.id.desc())
+    if after:
+        query = query.filter(sort_key < after)
+    elif page > 1:
+        # Old ?page=N links still work, they just pay for the OFFSET
+        query = query.offset((page - 1) * per_page)
+    posts = query.limit(per_page + 1).all()
+    return as_cards(posts[:per_page]), bool(after) or page > 1, len(posts) > per_page
+
+@app.route('/')
+def index():
+    selected = request.args.get('cat', 'all').lower()
+    page = max(1, int(request.args.get('page', 1)))
+    after = decode_cursor(request.args.get('after'))
+    before = decode_cursor(request.args.get('before'))
+    per_page = 20
+    cache_key = ('index', selected, page, after, before)
+    cached = cached_page(cache_key)
+    if cached is not None:
+        return cached
+
+    posts, has_prev, has_next = fetch_listing(selected, per_page, page, after, before)
+    if not has_prev:
+        page = 1
+    prev_cursor = encode_cursor(posts[0]) if posts else ''
+    next_cursor = encode_cursor(posts[-1]) if posts else ''
+
+    page_title = f"{CATEGORIES.get(selected, 'All News')} - NaijaBuzz"
+    page_desc = "Latest Nigerian news, football, gossip, entertainment, tech & world updates - refreshed frequently!"
+    featured_img = posts[0].image if posts else "/static/img/naijabuzz-placeholder.jpg"
+
+    body = index_template.render(posts=posts, categories=CATEGORIES, selected=selected,
+                                 page=page, has_prev=has_prev, has_next=has_next,
+                                 prev_cursor=prev_cursor, next_cursor=next_cursor, page_title=page_title, page_desc=page_desc, featured_img=featured_img)
+    return cache_page(cache_key, body, (selected,))
 
 @app.route('/<slug>')
 def post_detail(slug):
-    post = Post.query.filter_by(slug=slug).first()
+    cache_key = ('post', slug)
+    cached = cached_page(cache_key)
+    if cached is not None:
+        return cached
+    post = Post.query.options(undefer(Post.full_content)).filter_by(slug=slug).first()
     if not post:
         abort(404, description="Article not found")
 
-    related = Post.query.filter(Post.category == post.category, Post.id != post.id).order_by(Post.pub_date.desc()).limit(6).all()
-
-    def ago(dt):
-        if not dt: return "Just now"
-        if dt.tzinfo is None: dt = dt.replace(tzinfo=timezone.utc)
-        diff = datetime.now(timezone.utc) - dt
-        if diff < timedelta(minutes=60): return f"{int(diff.total_seconds()//60)}m ago"
-        if diff < timedelta(hours=24): return f"{int(diff.total_seconds()//3600)}h ago"
-        if diff < timedelta(days=7): return f"{diff.days}d ago"
-        return dt.strftime("%b %d, %Y")
+    related = as_cards(card_query().filter(Post.category_key == post.category_key, Post.id != post.id).order_by(Post.pub_date.desc(), Post.id.desc()).limit(6))
 
     page_title = f"{post.title} - NaijaBuzz"
     page_desc = post.excerpt[:160] or "Read the latest curated news story."
     featured_img = post.image or "/static/img/naijabuzz-placeholder.jpg"
 
-    html = """
-    <!DOCTYPE html>
-    <html lang="en">
-    <head>
-        <meta charset="UTF-8">
-        <meta name="viewport" content="width=device-width, initial-scale=1.0">
-        <title>{{ page_title }}</title>
-        <meta name="description" content="{{ page_desc }}">
-        <meta name="robots" content="index, follow">
-        <link rel="canonical" href="https://naijabuzz.com/{{ post.slug }}">
-        <meta property="og:title" content="{{ page_title }}">
-        <meta property="og:description" content="{{ page_desc }}">
-        <meta property="og:image" content="{{ featured_img }}">
-        <meta property="og:url" content="https://naijabuzz.com/{{ post.slug }}">
-        <meta property="og:type" content="article">
-        <meta name="twitter:card" content="summary_large_image">
-        <link href="https://fonts.googleapis.com/css2?family=Inter:wght@300;400;500;600;700;900&family=Playfair+Display:wght@700&display=swap" rel="stylesheet">
-        <style>
-            :root {
-                --primary: #0066cc;
-                --primary-dark: #004080;
-                --accent: #ff6b35;
-                --dark: #0f172a;
-                --light: #f8fafc;
-                --gray: #64748b;
-                --border: #e2e8f0;
-            }
-            * { box-sizing: border-box; margin: 0; padding: 0; }
-            body {
-                font-family: 'Inter', system-ui, sans-serif;
-                background: var(--light);
-                color: #1e293b;
-                line-height: 1.8;
-                font-size: 1.1rem;
-            }
-            header {
-                background: linear-gradient(135deg, var(--dark) 0%, #1e293b 100%);
-                color: white;
-                position: sticky;
-                top: 0;
-                z-index: 1000;
-                box-shadow: 0 2px 8px rgba(0,0,0,0.15);
-                padding: 0.8rem 0;
-            }
-            .header-inner {
-                text-align: center;
-                padding: 0 1rem;
-            }
-            h1 {
-                font-family: 'Playfair Display', serif;
-                font-size: 2.4rem;
-                font-weight: 700;
-                margin: 0.2rem 0 0;
-                letter-spacing: -1px;
-            }
-            .tabs-container {
-                background: white;
-                padding: 0.6rem 0;
-                overflow-x: auto;
-                border-bottom: 1px solid var(--border);
-            }
-            .tabs {
-                display: flex;
-                gap: 0.6rem;
-                padding: 0 0.8rem;
-                white-space: nowrap;
-                justify-content: flex-start;
-            }
-            .tab {
-                padding: 0.5rem 1.1rem;
-                background: #f1f5f9;
-                color: #475569;
-                border-radius: 9999px;
-                font-weight: 600;
-                font-size: 0.9rem;
-                text-decoration: none;
-                transition: all 0.3s ease;
-            }
-            .tab:hover, .tab.active {
-                background: var(--primary);
-                color: white;
-            }
-            .single-container {
-                max-width: 1000px;
-                margin: 1.5rem auto;
-                padding: 0 1rem;
-            }
-            .single-img {
-                width: 100%;
-                max-height: 500px;
-                object-fit: cover;
-                border-radius: 1rem;
-                margin: 1rem 0 1.5rem;
-                box-shadow: 0 6px 20px rgba(0,0,0,0.1);
-            }
-            .single-meta {
-                color: var(--primary);
-                font-weight: 700;
-                font-size: 0.95rem;
-                text-transform: uppercase;
-                letter-spacing: 1px;
-                margin-bottom: 0.8rem;
-            }
-            h1 {
-                font-size: 2.4rem;
-                line-height: 1.2;
-                margin-bottom: 0.8rem;
-                color: var(--dark);
-            }
-            .single-content {
-                line-height: 1.9;
-                font-size: 1.12rem;
-                color: #1e293b;
-            }
-            .single-content h2, .single-content h3 {
-                margin: 1.8rem 0 0.8rem;
-                color: var(--dark);
-            }
-            .source {
-                margin: 2rem 0 2.5rem;
-                font-style: italic;
-                color: var(--gray);
-                font-size: 0.9rem;
-            }
-            .source a {
-                color: var(--primary);
-                text-decoration: none;
-            }
-            .related {
-                margin-top: 3rem;
-            }
-            .related h2 {
-                font-family: 'Playfair Display', serif;
-                font-size: 1.8rem;
-                margin-bottom: 1.2rem;
-                color: var(--dark);
-            }
-            .related-grid {
-                display: grid;
-                grid-template-columns: repeat(auto-fill, minmax(280px, 1fr));
-                gap: 1.5rem;
-            }
-            .related .card {
-                background: white;
-                border-radius: 0.8rem;
-                overflow: hidden;
-                box-shadow: 0 3px 12px rgba(0,0,0,0.08);
-                transition: all 0.3s;
-            }
-            .related .card:hover {
-                transform: translateY(-4px);
-                box-shadow: 0 12px 24px rgba(0,0,0,0.1);
-            }
-            .related .img-container {
-                height: 160px;
-                background: #0f172a;
-                overflow: hidden;
-            }
-            .related .img-container img {
-                width: 100%;
-                height: 100%;
-                object-fit: cover;
-            }
-            .related .content {
-                padding: 1rem;
-            }
-            .related .card h2 {
-                font-size: 1.15rem;
-                margin-bottom: 0.4rem;
-            }
-            .related .meta {
-                font-size: 0.8rem;
-                color: var(--gray);
-            }
-            footer {
-                text-align: center;
-                padding: 3rem 1rem 2rem;
-                background: var(--dark);
-                color: #94a3b8;
-                font-size: 0.9rem;
-            }
-            footer a {
-                color: var(--primary);
-                text-decoration: none;
-            }
-            @media (max-width: 768px) {
-                header { padding: 0.6rem 0; }
-                h1 { font-size: 2.2rem; margin: 0.2rem 0; }
-                .tabs-container { padding: 0.4rem 0; }
-                .tabs { padding: 0 0.3rem; gap: 0.4rem; }
-                .tab { padding: 0.4rem 0.9rem; font-size: 0.85rem; }
-                .single-container { margin: 0.8rem auto; padding: 0 0.6rem; }
-                .single-img { max-height: 380px; margin: 0.6rem 0 1rem; }
-                .single-meta { font-size: 0.85rem; margin-bottom: 0.5rem; }
-                .single-content { font-size: 1.05rem; }
-                .related-grid { grid-template-columns: 1fr; gap: 1.2rem; }
-            }
-            @media (max-width: 480px) {
-                h1 { font-size: 1.9rem; }
-                .single-img { max-height: 320px; }
-            }
-        </style>
-    </head>
-    <body>
-        <header>
-            <div class="header-inner">
-                <h1><a href="/" style="color:white;text-decoration:none;">NaijaBuzz</a></h1>
-            </div>
+    body = post_template.render(post=post, related=related, page_title=page_title, page_desc=page_desc, featured_img=featured_img, categories=CATEGORIES, selected=post.category.lower())
+    return cache_page(cache_key, body, (post.category_key,))
 
-            <nav class="tabs-container">
-                <div class="tabs">
-                    {% for key, name in categories.items() %}
-                    <a href="/?cat={{ key }}" class="tab {{ 'active' if selected == key else '' }}">{{ name }}</a>
-                    {% endfor %}
-                </div>
-            </nav>
-        </header>
-
-        <div class="single-container">
-            <div class="single-meta">{{ post.category }} • {{ ago(post.pub_date) }}</div>
-            <h1>{{ post.title }}</h1>
-            <img loading="lazy" src="{{ featured_img }}" alt="{{ post.title }}" class="single-img">
-            <div class="single-content">{{ post.full_content | safe }}</div>
-            <div class="source">Source: <a href="{{ post.link }}" target="_blank" rel="noopener nofollow">Original Article</a> • AI-enhanced version for clarity & Nigerian context</div>
-
-            <div class="related">
-                <h2>Related Stories</h2>
-                <div class="related-grid">
-                    {% for r in related %}
-                    <div class="card">
-                        <div class="img-container">
-                            <img loading="lazy" src="{{ r.image }}" alt="{{ r.title }}">
-                        </div>
-                        <div class="content">
-                            <h2><a href="/{{ r.slug }}">{{ r.title }}</a></h2>
-                            <div class="meta">{{ r.category }} • {{ ago(r.pub_date) }}</div>
-                        </div>
-                    </div>
-                    {% endfor %}
-                </div>
-            </div>
-        </div>
+# Full-text search (migration 004): an FTS5 table post_fts on SQLite, a GIN expression index over
+# PG_SEARCH_VECTOR on Postgres. Matches come back wrapped in \x02/\x03 and become <mark> after escaping.
+SEARCH_TIMEOUT_MS = int(os.environ.get('SEARCH_TIMEOUT_MS', 1500))
+SEARCH_PER_PAGE = 20
+SEARCH_MAX_PAGES = 10
+SEARCH_MAX_TERMS = 8
+# 'postgresql', 'fts5' or None (title LIKE fallback); set by init_db() once migrations have run,
+# or by search_backend() in processes that skipped init_db() or survived it failing
+SEARCH_BACKEND = None
+SEARCH_BACKEND_RECHECK = 60
+_search_backend = {'at': None}
+SearchResult = namedtuple('SearchResult', 'id title slug image category pub_date title_html snippet_html')
 
-        <footer>
-            © 2026 <a href="/">NaijaBuzz</a> • All rights reserved • Auto-refreshed every 15 minutes
-        </footer>
-    </body>
-    </html>
-    """
-    return render_template_string(html, post=post, related=related, ago=ago, page_title=page_title, page_desc=page_desc, featured_img=featured_img, categories=CATEGORIES, selected=post.category.lower())
+FTS5_SEARCH_SQL = """
+SELECT p.id, p.title, p.slug, p.image, p.category, p.pub_date,
+       highlight(post_fts, 0, char(2), char(3)) AS title_marked,
+       snippet(post_fts, 1, char(2), char(3), ' … ', 32) AS snippet_marked
+FROM post_fts JOIN post p ON p.id = post_fts.rowid
+WHERE post_fts MATCH :match
+ORDER BY bm25(post_fts, 10.0, 1.0), p.pub_date DESC
+LIMIT :limit OFFSET :offset
+"""
 
-@app.route('/cron')
-@app.route('/generate')
-def cron():
-    added = 0
-    skipped = 0
-    errors = []
+# Rank and page first, then build headlines for the page only: ts_headline re-parses the document
+PG_SEARCH_SQL = f"""
+SELECT id, title, slug, image, category, pub_date,
+       ts_headline('english', coalesce(title, ''), query, :title_opts) AS title_marked,
+       ts_headline('english', regexp_replace(coalesce(full_content, excerpt, ''), '<[^>]+>', ' ', 'g'),
+                   query, :snippet_opts) AS snippet_marked
+FROM (
+    SELECT p.id, p.title, p.slug, p.image, p.category, p.pub_date, p.full_content, p.excerpt, q.query,
+           ts_rank_cd({PG_SEARCH_VECTOR}, q.query) AS rank
+    FROM post p, websearch_to_tsquery('english', :q) AS q(query)
+    WHERE {PG_SEARCH_VECTOR} @@ q.query
+    ORDER BY rank DESC, p.pub_date DESC
+    LIMIT :limit OFFSET :offset
+) hits
+ORDER BY rank DESC, pub_date DESC
+"""
+PG_TITLE_OPTS = 'HighlightAll=true, StartSel=\x02, StopSel=\x03'
+PG_SNIPPET_OPTS = 'StartSel=\x02, StopSel=\x03, MaxWords=35, MinWords=15, MaxFragments=2, FragmentDelimiter=" … "'
 
+def detect_search_backend():
+    # The Postgres query needs no schema of its own; without ix_post_search it is just slower
+    if db.engine.dialect.name == 'postgresql':
+        return 'postgresql'
+    # An empty probe query rather than reflection, so this is also safe on the request path
     try:
-        init_db()
+        with db.engine.connect() as conn:
+            conn.execute(text("SELECT rowid FROM post_fts LIMIT 0"))
+    except sqlalchemy.exc.OperationalError:
+        return None
+    return 'fts5'
+
+def search_backend():
+    # A missing index is looked for again now and then: another process may still be migrating
+    global SEARCH_BACKEND
+    now = time.monotonic()
+    if SEARCH_BACKEND is None and (_search_backend['at'] is None or now - _search_backend['at'] > SEARCH_BACKEND_RECHECK):
+        _search_backend['at'] = now
+        try:
+            SEARCH_BACKEND = detect_search_backend()
+        except Exception as ex:
+            print(f"[SEARCH] backend check failed: {ex}")
+    return SEARCH_BACKEND
+
+def search_text(content):
+    # Rewrites are HTML; the index only wants the words
+    if not content:
+        return ''
+    return ' '.join(html.unescape(re.sub(r'<[^>]+>', ' ', content)).split())
+
+def highlight(marked):
+    return html.escape(html.unescape(marked or '')).replace('\x02', '<mark>').replace('\x03', '</mark>')
+
+# On SQLite the index follows Post writes inside the same flush, so ingestion (inserts) and the
+# rewrite queue (full_content upgrades) keep it current row by row. Postgres needs none of this.
+@sqlalchemy.event.listens_for(Post, 'after_insert')
+def index_new_post(mapper, connection, target):
+    if SEARCH_BACKEND == 'fts5':
+        connection.execute(text("INSERT INTO post_fts(rowid, title, body) VALUES (:id, :title, :body)"), {
+            'id': target.id, 'title': target.title or '',
+            'body': search_text(sqlalchemy.inspect(target).dict.get('full_content'))})
 
+@sqlalchemy.event.listens_for(Post, 'after_update')
+def reindex_post(mapper, connection, target):
+    if SEARCH_BACKEND != 'fts5':
+        return
+    # Only what changed; full_content is deferred and may not even be loaded
+    state = sqlalchemy.inspect(target)
+    values = {}
+    if state.attrs.title.history.has_changes():
+        values['title'] = target.title or ''
+    if state.attrs.full_content.history.has_changes():
+        values['body'] = search_text(state.dict.get('full_content'))
+    if values:
+        assignments = ', '.join(f"{name} = :{name}" for name in values)
+        connection.execute(text(f"UPDATE post_fts SET {assignments} WHERE rowid = :id"), {'id': target.id, **values})
+
+@sqlalchemy.event.listens_for(Post, 'after_delete')
+def unindex_post(mapper, connection, target):
+    if SEARCH_BACKEND == 'fts5':
+        connection.execute(text("DELETE FROM post_fts WHERE rowid = :id"), {'id': target.id})
+
+@contextmanager
+def statement_time_limit(ms):
+    # Postgres cancels the statement itself; SQLite gets interrupted from its progress handler
+    conn = db.session.connection()
+    if db.engine.dialect.name == 'postgresql':
+        conn.execute(text(f"SET LOCAL statement_timeout = {int(ms)}"))
+        yield
+    elif db.engine.dialect.name == 'sqlite':
+        raw = conn.connection.driver_connection
+        deadline = time.monotonic() + ms / 1000
+        raw.set_progress_handler(lambda: time.monotonic() > deadline, 1000)
         try:
-            db.session.execute(text("SELECT 1"))
-        except Exception as db_err:
-            errors.append(f"DB ping failed: {str(db_err)}")
+            yield
+        finally:
+            raw.set_progress_handler(None, 0)
+    else:
+        yield
+
+def run_search(q, page):
+    """One page of ranked results for q, plus whether there is another page."""
+    params = {'limit': SEARCH_PER_PAGE + 1, 'offset': (page - 1) * SEARCH_PER_PAGE}
+    terms = re.findall(r'\w+', q.lower())[:SEARCH_MAX_TERMS]
+    backend = search_backend()
+    if backend == 'postgresql':
+        rows = db.session.execute(text(PG_SEARCH_SQL).columns(pub_date=db.DateTime), dict(
+            params, q=q, title_opts=PG_TITLE_OPTS, snippet_opts=PG_SNIPPET_OPTS)).all()
+    elif backend == 'fts5' and terms:
+        # Every term quoted (no FTS5 syntax from readers) and ANDed; the last one also matches as a prefix
+        match = ' '.join(f'"{t}"' for t in terms) + '*'
+        rows = db.session.execute(text(FTS5_SEARCH_SQL).columns(pub_date=db.DateTime), dict(params, match=match)).all()
+    elif terms:
+        query = card_query().filter(*[Post.title.ilike(f'%{t}%') for t in terms])
+        rows = [(c.id, c.title, c.slug, c.image, c.category, c.pub_date, c.title, search_text(c.excerpt)[:240])
+                for c in as_cards(query.order_by(Post.pub_date.desc(), Post.id.desc())
+                                  .offset(params['offset']).limit(params['limit']))]
+    else:
+        rows = []
+    results = [SearchResult(*row[:6], highlight(row[6]), highlight(row[7])) for row in rows[:SEARCH_PER_PAGE]]
+    return results, len(rows) > SEARCH_PER_PAGE
+
+@app.route('/search')
+def search():
+    q = ' '.join(request.args.get('q', '').split())[:200]
+    page = min(max(1, request.args.get('page', 1, type=int)), SEARCH_MAX_PAGES)
+    cache_key = ('search', q.lower(), page)
+    cached = cached_page(cache_key)
+    if cached is not None:
+        return cached
+
+    results, has_next, failed = [], False, False
+    if q:
+        started = time.monotonic()
+        try:
+            with statement_time_limit(SEARCH_TIMEOUT_MS):
+                results, has_next = run_search(q, page)
+        except sqlalchemy.exc.OperationalError as ex:
             db.session.rollback()
+            failed = True
+            print(f"[SEARCH] {q!r} failed after {(time.monotonic() - started) * 1000:.0f}ms: {str(ex)[:120]}")
 
-        with app.app_context():
-            random.shuffle(FEEDS)
-            print(f"Processing batch of 10 feeds...")
-            batch_size = 10
-            for cat, url in FEEDS[:batch_size]:
+    page_title = f"{q} - Search - NaijaBuzz" if q else "Search - NaijaBuzz"
+    body = search_template.render(q=q, results=results, page=page, failed=failed,
+                                  has_prev=page > 1, has_next=has_next and page < SEARCH_MAX_PAGES,
+                                  categories=CATEGORIES, page_title=page_title)
+    if failed:
+        return app.response_class(body, status=503, mimetype='text/html')
+    return cache_page(cache_key, body, ('all',))
+
+def entry_hash(e):
+    return hashlib.md5((e.link + e.title).encode()).hexdigest()
+
+SEEN_MAX_ATTEMPTS = int(os.environ.get('SEEN_MAX_ATTEMPTS', 3))
+SEEN_ENTRY_DAYS = int(os.environ.get('SEEN_ENTRY_DAYS', 60))
+
+def entry_id(e):
+    return e.get('id') or e.get('link') or ''
+
+def seen_key(feed_url, e):
+    return hashlib.md5(f"{feed_url}|{entry_id(e)}".encode()).hexdigest()
+
+# key -> (status, attempts); loaded from SeenEntry once per process, then kept in step with it
+_seen_cache = None
+_seen_lock = threading.Lock()
+
+def seen_index():
+    global _seen_cache
+    with _seen_lock:
+        if _seen_cache is None:
+            _seen_cache = {key: (status, attempts or 0) for key, status, attempts in
+                           db.session.query(SeenEntry.key, SeenEntry.status, SeenEntry.attempts)}
+        return _seen_cache
+
+def already_seen(key):
+    status, attempts = seen_index().get(key, (None, 0))
+    return status == 'ok' or attempts >= SEEN_MAX_ATTEMPTS
+
+def record_seen(key, feed_url, ok):
+    # Joins the caller's session; committed with the ingest batch
+    index = seen_index()
+    status, attempts = ('ok', 0) if ok else ('failed', index.get(key, (None, 0))[1] + 1)
+    now = datetime.now(timezone.utc)
+    if key in index:
+        SeenEntry.query.filter_by(key=key).update({'status': status, 'attempts': attempts, 'last_seen': now})
+    else:
+        db.session.add(SeenEntry(key=key, feed_url=feed_url, status=status, attempts=attempts))
+    index[key] = (status, attempts)
+
+def reset_seen_index():
+    global _seen_cache
+    with _seen_lock:
+        _seen_cache = None
+
+def prune_seen_entries():
+    cutoff = datetime.now(timezone.utc) - timedelta(days=SEEN_ENTRY_DAYS)
+    removed = SeenEntry.query.filter(SeenEntry.last_seen < cutoff).delete(synchronize_session=False)
+    db.session.commit()
+    if removed:
+        reset_seen_index()
+    return removed
+
+# Adaptive per-feed scheduling: poll roughly once per expected new story,
+# back off exponentially on failures
+MIN_POLL = float(os.environ.get('MIN_POLL', 300))
+MAX_POLL = float(os.environ.get('MAX_POLL', 6 * 3600))
+MAX_BACKOFF = float(os.environ.get('MAX_BACKOFF', 24 * 3600))
+DEFAULT_POLL = float(os.environ.get('DEFAULT_POLL', 900))
+
+def as_utc(dt):
+    if dt is not None and dt.tzinfo is None:
+        return dt.replace(tzinfo=timezone.utc)
+    return dt
+
+def due_feeds(feeds, states, now=None):
+    # Priority queue on next poll time: most overdue first, unseen feeds immediately
+    now = now or datetime.now(timezone.utc)
+    never = datetime.min.replace(tzinfo=timezone.utc)
+    heap = []
+    for i, (cat, url) in enumerate(feeds):
+        fs = states.get(url)
+        next_poll = as_utc(fs.next_poll_at) if fs is not None and fs.next_poll_at else never
+        heapq.heappush(heap, (next_poll, i, cat, url))
+    due = []
+    while heap and heap[0][0] <= now:
+        _, _, cat, url = heapq.heappop(heap)
+        due.append((cat, url))
+    return due
+
+def posting_rate(entries):
+    # Stories per hour, from the publish times of the most recent entries
+    stamps = sorted(
+        (calendar.timegm(t) for t in (e.get('published_parsed') or e.get('updated_parsed') for e in entries) if t),
+        reverse=True)[:20]
+    if len(stamps) < 2:
+        return None
+    span_hours = max((stamps[0] - stamps[-1]) / 3600, 0.1)
+    return (len(stamps) - 1) / span_hours
+
+def schedule_success(fs, rate):
+    if rate is not None:
+        fs.posts_per_hour = rate if fs.posts_per_hour is None else 0.5 * fs.posts_per_hour + 0.5 * rate
+        interval = 3600 / fs.posts_per_hour
+    elif fs.poll_interval and not fs.failures:
+        # 304 or undated entries: nothing new to learn from, ease off a little
+        interval = fs.poll_interval * 1.25
+    else:
+        interval = DEFAULT_POLL
+    fs.poll_interval = min(max(interval, MIN_POLL), MAX_POLL)
+    fs.failures = 0
+    fs.next_poll_at = datetime.now(timezone.utc) + timedelta(seconds=fs.poll_interval)
+
+def schedule_failure(fs):
+    fs.failures = (fs.failures or 0) + 1
+    fs.poll_interval = min(DEFAULT_POLL * 2 ** fs.failures, MAX_BACKOFF)
+    fs.next_poll_at = datetime.now(timezone.utc) + timedelta(seconds=fs.poll_interval)
+
+def fetch_feed(cat, url, etag=None, modified=None):
+    # Conditional GET: an unchanged feed comes back as a bodiless 304 and is never parsed
+    import requests, feedparser
+    headers = dict(HTTP_HEADERS)
+    if etag:
+        headers['If-None-Match'] = etag
+    if modified:
+        headers['If-Modified-Since'] = modified
+    started = time.monotonic()
+    with host_slot(url), stage('fetch'):
+        resp = requests.get(url, headers=headers, timeout=FEED_TIMEOUT)
+    duration = time.monotonic() - started
+    if resp.status_code == 304:
+        return {'status': 304, 'feed': None, 'etag': etag, 'modified': modified, 'duration': duration}
+    resp.raise_for_status()
+    with stage('parse'):
+        feed = feedparser.parse(resp.content)
+    return {
+        'status': resp.status_code,
+        'feed': feed,
+        'etag': resp.headers.get('ETag'),
+        'modified': resp.headers.get('Last-Modified'),
+        'duration': duration,
+    }
+
+def build_entry(cat, e):
+    # Extraction for one feed entry. Runs in a worker thread; the only DB access is the
+    # rewrite cache lookup, which opens its own app context.
+    # Returns the Post fields plus the source text still waiting for a rewrite (None on a cache hit).
+    with stage('extract'):
+        summary = e.get('summary') or e.get('description') or ''
+        scan = scan_html(entry_html(e), text_limit=EXCERPT_CHARS if summary else 0)
+        img = get_image(e, scan)
+        excerpt = scan.text + "..." if summary else ""
+        article = extract_article(e.link)
+    title = e.title or "Untitled"
+    full_text = (article and article.text) or excerpt
+    if not img and article and article.top_image:
+        img = article.top_image
+    if not img:
+        img = "/static/img/naijabuzz-placeholder.jpg"
+    rewritten = cached_rewrite(rewrite_key(title, full_text))
+    fields = dict(
+        title=title,
+        excerpt=excerpt,
+        full_content=rewritten or excerpt or full_text,
+        link=e.link,
+        unique_hash=entry_hash(e),
+        image=img,
+        category=cat,
+        pub_date=parse_date(getattr(e, 'published', None))
+    )
+    return fields, None if rewritten else full_text
+
+def existing_hashes(hashes):
+    # One IN query for a whole batch instead of a lookup per entry
+    if not hashes:
+        return set()
+    return {h for (h,) in db.session.query(Post.unique_hash).filter(Post.unique_hash.in_(list(hashes)))}
+
+def assign_slugs(rows, taken):
+    # Bulk slug assignment: every candidate slug for the batch is checked in one query,
+    # then collisions (with the DB, this run or each other) are resolved in memory
+    from slugify import slugify
+    bases = [slugify(fields['title'])[:180] for fields in rows]
+    candidates = {f"{base}-{i}" if i else base for base in bases for i in range(6)}
+    used = taken | {s for (s,) in db.session.query(Post.slug).filter(Post.slug.in_(list(candidates)))}
+    slugs = []
+    for base, fields in zip(bases, rows):
+        slug = base
+        count = 1
+        while slug in used:
+            slug = f"{base}-{count}"
+            count += 1
+            if count > 5:
+                slug = f"{base}-{fields['unique_hash'][:8]}"
+                break
+        used.add(slug)
+        slugs.append(slug)
+    return slugs
+
+def ensure_feed_states(urls, states):
+    # Another worker may be creating the same rows: insert the batch, and on a unique clash fall back
+    # to one row at a time, keeping whichever row won
+    missing = [url for url in urls if url not in states]
+    if not missing:
+        return
+    try:
+        db.session.add_all([FeedState(url=url) for url in missing])
+        db.session.commit()
+    except sqlalchemy.exc.IntegrityError:
+        db.session.rollback()
+        for url in missing:
+            db.session.add(FeedState(url=url))
+            try:
+                db.session.commit()
+            except sqlalchemy.exc.IntegrityError:
+                db.session.rollback()
+    for fs in FeedState.query.filter(FeedState.url.in_(missing)):
+        states[fs.url] = fs
+
+def claim_feeds(feeds, states, owner, limit):
+    """Claim up to `limit` of feeds for this worker with one conditional UPDATE and return the ones
+    it got. Feeds claimed by another live worker are left to that worker. Workers claim a small
+    batch at a time and come back for more, so concurrent workers share the list."""
+    urls = [url for _, url in feeds]
+    ensure_feed_states(urls, states)
+    now = datetime.now(timezone.utc)
+    free = (FeedState.url.in_(urls),
+            or_(FeedState.claimed_by.is_(None), FeedState.claimed_until < now, FeedState.claimed_by == owner))
+    batch = (db.session.query(FeedState.id).filter(*free)
+             .order_by(FeedState.next_poll_at.asc().nullsfirst(), FeedState.id).limit(limit))
+    if db.engine.dialect.name == 'postgresql':
+        # Rows another worker is claiming right now are skipped, not waited for
+        batch = batch.with_for_update(skip_locked=True)
+    FeedState.query.filter(FeedState.id.in_(batch.scalar_subquery()), *free).update(
+        {'claimed_by': owner, 'claimed_until': now + timedelta(seconds=INGEST_LEASE_TTL)}, synchronize_session=False)
+    db.session.commit()
+    mine = {url for (url,) in db.session.query(FeedState.url).filter(FeedState.url.in_(urls), FeedState.claimed_by == owner)}
+    return [(cat, url) for cat, url in feeds if url in mine]
+
+def store_one_by_one(built, taken_slugs):
+    """Fallback when a batch insert hits a unique constraint, usually a story another worker
+    stored first: insert row by row and keep everything that fits. Returns the stored fields."""
+    stored = []
+    reset_seen_index()
+    for url, key, (fields, source_text) in built:
+        base = assign_slugs([fields], taken_slugs)[0]
+        for slug in (base, f"{base[:180]}-{fields['unique_hash'][:8]}"):
+            post = Post(slug=slug, **fields)
+            db.session.add(post)
+            if source_text:
+                db.session.add(RewriteJob(post=post, source_text=source_text))
+            try:
+                db.session.commit()
+            except sqlalchemy.exc.IntegrityError:
+                db.session.rollback()
+                if existing_hashes({fields['unique_hash']}):
+                    break
+                continue
+            stored.append(fields)
+            taken_slugs.add(slug)
+            break
+        record_seen(key, url, ok=True)
+    db.session.commit()
+    return stored
+
+def store_batch(built, taken_slugs, stats):
+    """Insert finished entries plus whatever feed/seen state changed this round, in one commit."""
+    if built:
+        slugs = assign_slugs([fields for _, _, (fields, _) in built], taken_slugs)
+        posts = []
+        for slug, (url, key, (fields, source_text)) in zip(slugs, built):
+            post = Post(slug=slug, **fields)
+            posts.append(post)
+            if source_text:
+                posts.append(RewriteJob(post=post, source_text=source_text))
+            record_seen(key, url, ok=True)
+        db.session.add_all(posts)
+        taken_slugs.update(slugs)
+    try:
+        db.session.commit()
+        stats['added'] += len(built)
+        if built:
+            bump_content_versions({fields['category'] for _, _, (fields, _) in built})
+    except sqlalchemy.exc.IntegrityError as commit_ex:
+        db.session.rollback()
+        print(f"[INGEST] Batch hit a unique constraint, storing row by row: {str(commit_ex)[:120]}")
+        try:
+            stored = store_one_by_one(built, taken_slugs)
+            stats['added'] += len(stored)
+            stats['skipped'] += len(built) - len(stored)
+            if stored:
+                bump_content_versions({fields['category'] for fields in stored})
+        except Exception as row_ex:
+            db.session.rollback()
+            reset_seen_index()
+            stats['skipped'] += len(built)
+            stats['errors'].append(str(row_ex)[:150])
+    except Exception as commit_ex:
+        db.session.rollback()
+        reset_seen_index()
+        stats['skipped'] += len(built)
+        stats['errors'].append(str(commit_ex)[:150])
+
+def load_ingest_modules():
+    # The crawl dependencies are imported where they are used so the web tier never loads them.
+    # Load them here, on the main thread, before the worker pools race to import them.
+    started = time.perf_counter()
+    import feedparser, requests, newspaper, slugify, dateutil.parser  # noqa: F401
+    return time.perf_counter() - started
+
+def run_ingest(feeds=None, budget=CRON_TIME_BUDGET, lease=None):
+    """Fetch feeds concurrently, fan new entries out to extraction/rewrite workers and
+    store whatever finishes inside the time budget. Must be called inside an app context.
+    With a lease, only the feeds this worker manages to claim are polled."""
+    reset_stage_timings()
+    loaded = load_ingest_modules()
+    if loaded > 0.05:
+        print(f"[INGEST] Loaded crawl dependencies in {loaded * 1000:.0f}ms")
+    stats = {'added': 0, 'skipped': 0, 'errors': []}
+    started = time.monotonic()
+    # Leave part of the budget for the rewrite queue; new posts are already live either way
+    deadline = started + budget * (1 - REWRITE_BUDGET_SHARE)
+    try:
+        pruned = prune_rewrite_cache()
+        if pruned:
+            print(f"[CACHE] Evicted {pruned} rewrites older than {REWRITE_CACHE_DAYS} days")
+        pruned = prune_seen_entries()
+        if pruned:
+            print(f"[SEEN] Forgot {pruned} entries older than {SEEN_ENTRY_DAYS} days")
+    except Exception as ex:
+        db.session.rollback()
+        stats['errors'].append(f"Cache prune failed: {str(ex)[:120]}")
+    states = {fs.url: fs for fs in FeedState.query.all()}
+    if feeds is None:
+        feeds = due_feeds(FEEDS, states)
+        print(f"[SCHEDULE] {len(feeds)}/{len(FEEDS)} feeds due")
+    feeds = list(feeds)
+    feed_pool = ThreadPoolExecutor(FETCH_WORKERS, thread_name_prefix='feed')
+    entry_pool = ThreadPoolExecutor(ENTRY_WORKERS, thread_name_prefix='entry')
+    image_pool = ThreadPoolExecutor(IMAGE_WORKERS, thread_name_prefix='image')
+    image_jobs = []
+    pending = {}
+
+    def submit_feeds(batch):
+        for cat, url in batch:
+            fs = states.get(url)
+            fut = feed_pool.submit(fetch_feed, cat, url, fs and fs.etag, fs and fs.modified)
+            pending[fut] = ('feed', cat, url, None)
+
+    # With a lease, feeds are claimed CLAIM_BATCH at a time and topped up as fetches finish
+    unclaimed = feeds if lease is not None else []
+    claimed = 0
+
+    def claim_more():
+        nonlocal unclaimed, claimed
+        fetching = sum(1 for kind, _, _, _ in pending.values() if kind == 'feed')
+        if not unclaimed or fetching > CLAIM_BATCH // 2:
+            return
+        got = claim_feeds(unclaimed, states, lease.owner, CLAIM_BATCH - fetching)
+        unclaimed = [feed for feed in unclaimed if feed not in got]
+        claimed += len(got)
+        lease.feeds = claimed
+        submit_feeds(got)
+
+    if lease is None:
+        submit_feeds(feeds)
+    else:
+        claim_more()
+    in_flight = set()
+    taken_slugs = set()
+    unchanged = 0
+    print(f"[INGEST] {len(feeds)} feeds, budget {budget:.0f}s")
+    try:
+        while pending:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                print(f"[INGEST] Time budget used up, dropping {len(pending)} unfinished jobs")
+                break
+            if lease is not None and lease.lost.is_set():
+                print(f"[INGEST] Lease lost, stopping with {len(pending)} unfinished jobs")
+                break
+            done, _ = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+            dirty = False
+            candidates = []
+            built = []
+            for fut in done:
+                kind, cat, url, key = pending.pop(fut)
+                if kind == 'feed':
+                    fs = states.get(url)
+                    if fs is None:
+                        fs = states[url] = FeedState(url=url)
+                        db.session.add(fs)
                 try:
-                    f = feedparser.parse(url)
-                    if not f.entries:
-                        print(f"No entries from {url}")
-                        continue
-                    for e in f.entries[:3]:
-                        try:
-                            h = hashlib.md5((e.link + e.title).encode()).hexdigest()
-                            if Post.query.filter_by(unique_hash=h).first():
-                                continue
-                            img = get_image(e)
-                            summary = e.get('summary') or e.get('description') or ''
-                            excerpt = BeautifulSoup(summary, 'html.parser').get_text(separator=' ')[:360] + "..." if summary else ""
-                            title = e.title or "Untitled"
-                            full_text = excerpt
-                            try:
-                                article = Article(e.link, fetch_images=False, request_timeout=10)
-                                article.download()
-                                article.parse()
-                                full_text = article.text or excerpt
-                                if not img and article.top_image:
-                                    img = article.top_image
-                                    if img.startswith('//'):
-                                        img = 'https:' + img
-                                    elif not img.startswith('http'):
-                                        img = urllib.parse.urljoin(e.link, img)
-                            except Exception as ex:
-                                print(f"Article fetch skipped for '{title}': {ex}")
-                                full_text = excerpt
-                            if not img:
-                                img = "/static/img/naijabuzz-placeholder.jpg"
-                            full_content = rewrite_article(full_text, title, cat)
-                            del full_text
-                            base_slug = slugify(title)[:180]
-                            slug = base_slug
-                            count = 1
-                            while Post.query.filter_by(slug=slug).first():
-                                slug = f"{base_slug}-{count}"
-                                count += 1
-                                if count > 5: break
-                            post = Post(
-                                title=title,
-                                excerpt=excerpt,
-                                full_content=full_content,
-                                link=e.link,
-                                unique_hash=h,
-                                slug=slug,
-                                image=img,
-                                category=cat,
-                                pub_date=parse_date(getattr(e, 'published', None))
-                            )
-                            db.session.add(post)
-                            added += 1
-                        except Exception as item_ex:
-                            skipped += 1
-                            errors.append(str(item_ex)[:150])
-                            continue
-                    db.session.commit()
-                except Exception as feed_ex:
-                    skipped += 1
-                    errors.append(str(feed_ex)[:150])
+                    result = fut.result()
+                except Exception as ex:
+                    if kind == 'feed':
+                        schedule_failure(fs)
+                    else:
+                        record_seen(key, url, ok=False)
+                    dirty = True
+                    stats['skipped'] += 1
+                    stats['errors'].append(str(ex)[:150])
+                    continue
+                if kind == 'entry':
+                    built.append((url, key, result))
+                    continue
+                fs.last_status = result['status']
+                fs.last_duration = result['duration']
+                fs.last_fetched = datetime.now(timezone.utc)
+                fs.etag, fs.modified = result['etag'], result['modified']
+                dirty = True
+                if result['status'] == 304:
+                    schedule_success(fs, None)
+                    unchanged += 1
                     continue
+                entries = result['feed'].entries
+                schedule_success(fs, posting_rate(entries))
+                if not entries:
+                    print(f"No entries from {url}")
+                    continue
+                for e in entries[:ENTRIES_PER_FEED]:
+                    try:
+                        key = seen_key(url, e)
+                        if not already_seen(key):
+                            candidates.append((cat, url, key, entry_hash(e), e))
+                    except Exception as item_ex:
+                        stats['skipped'] += 1
+                        stats['errors'].append(str(item_ex)[:150])
+
+            # Dedup every new candidate from this round with a single query
+            if candidates:
+                with stage('db'):
+                    known = existing_hashes({h for _, _, _, h, _ in candidates})
+                for cat, url, key, h, e in candidates:
+                    if h in known:
+                        record_seen(key, url, ok=True)
+                        dirty = True
+                    elif h not in in_flight:
+                        in_flight.add(h)
+                        pending[entry_pool.submit(build_entry, cat, e)] = ('entry', cat, url, key)
+
+            # Bulk insert finished entries: slugs in one query, one commit for the batch
+            if built or dirty:
+                with stage('db'):
+                    store_batch(built, taken_slugs, stats)
+                # Proxy variants for the new cards, built here instead of in front of a reader
+                images = {fields['image'] for _, _, (fields, _) in built}
+                image_jobs += [image_pool.submit(prefetch_image, src) for src in images
+                               if src.startswith(('http://', 'https://'))]
+            if lease is not None:
+                claim_more()
+    except BaseException:
+        image_pool.shutdown(wait=False, cancel_futures=True)
+        raise
+    finally:
+        feed_pool.shutdown(wait=False, cancel_futures=True)
+        entry_pool.shutdown(wait=False, cancel_futures=True)
+    print(f"[INGEST] {unchanged} feeds unchanged (304)")
+    if lease is not None:
+        print(f"[LEASE] {lease.owner} claimed {claimed}/{len(feeds)} feeds")
+    if lease is not None:
+        lease.phase = 'rewrite'
+    try:
+        # Images keep building while the rewrite queue drains; whatever is left goes to the proxy
+        stats.update(drain_rewrite_queue(started + budget - time.monotonic()))
+        if image_jobs:
+            _, unfinished = wait(image_jobs, timeout=max(0, started + budget - time.monotonic()))
+            if unfinished:
+                print(f"[IMAGE] Time budget used up, {len(unfinished)} images left to the proxy")
+    finally:
+        image_pool.shutdown(wait=False, cancel_futures=True)
+    print(f"[CACHE] rewrite hits {REWRITE_CACHE_STATS['hits']}, misses {REWRITE_CACHE_STATS['misses']}")
+    print("[INGEST] stages: " + ", ".join(
+        f"{name} {s['count']}x p50 {s['p50_ms']:.0f}ms p95 {s['p95_ms']:.0f}ms" for name, s in stage_summary().items()))
+    return stats
+
+def finish_rewrite(job, content, touched):
+    touched.add(job.post.category)
+    job.post.full_content = content
+    job.status = 'done'
+    job.source_text = None
+    job.updated_at = datetime.now(timezone.utc)
+
+def claim_rewrite_jobs(jobs, until):
+    # Other workers may have selected the same jobs: push not_before past this run with a
+    # conditional UPDATE per job and keep the ones where it stuck. If this worker dies the jobs
+    # simply become due again at `until`.
+    now = datetime.now(timezone.utc)
+    claimed = []
+    for job in jobs:
+        won = RewriteJob.query.filter(
+            RewriteJob.id == job.id, RewriteJob.status == 'pending',
+            or_(RewriteJob.not_before.is_(None), RewriteJob.not_before <= now),
+        ).update({'not_before': until}, synchronize_session=False)
+        if won:
+            claimed.append(job)
+    db.session.commit()
+    return claimed
+
+def drain_rewrite_queue(budget, limit=None):
+    """Rewrite queued posts concurrently (up to each provider's concurrency and RPM)
+    and upgrade them in place. Must be called inside an app context."""
+    stats = {'rewritten': 0, 'rewrite_failed': 0, 'rewrite_retry': 0}
+    if budget <= 1:
+        return stats
+    deadline = time.monotonic() + budget
+    now = datetime.now(timezone.utc)
+    jobs = (RewriteJob.query
+            .filter(RewriteJob.status == 'pending', or_(RewriteJob.not_before.is_(None), RewriteJob.not_before <= now))
+            .order_by(RewriteJob.id).limit(limit or REWRITE_BATCH).all())
+    jobs = claim_rewrite_jobs(jobs, now + timedelta(seconds=budget + REWRITE_DEADLINE))
+    if not jobs:
+        return stats
+    providers = rewrite_router.configured()
+    if not providers:
+        # Nothing can rewrite: publish the original text, same fallback as before
+        touched = set()
+        for job in jobs:
+            finish_rewrite(job, (job.source_text or job.post.full_content or '').strip(), touched)
+        db.session.commit()
+        bump_content_versions(touched)
+        stats['rewrite_failed'] += len(jobs)
+        return stats
+    workers = max(1, sum(p.concurrency for p in providers))
+    pool = ThreadPoolExecutor(workers, thread_name_prefix='rewrite')
+    pending = {}
+    for job in jobs:
+        post = job.post
+        per_article = min(REWRITE_DEADLINE, budget)
+        pending[pool.submit(try_rewrite, job.source_text or '', post.title, post.category, per_article,
+                             count_miss=False)] = job
+    print(f"[REWRITE QUEUE] {len(jobs)} jobs on {workers} workers")
+    try:
+        while pending:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                print(f"[REWRITE QUEUE] Time budget used up, {len(pending)} jobs left for next run")
+                break
+            done, _ = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+            touched = set()
+            for fut in done:
+                job = pending.pop(fut)
+                try:
+                    content = fut.result()
+                except Exception as ex:
+                    print(f"[REWRITE QUEUE] job {job.id} crashed: {ex}")
+                    content = None
+                if content:
+                    finish_rewrite(job, content, touched)
+                    stats['rewritten'] += 1
+                    continue
+                job.attempts = (job.attempts or 0) + 1
+                job.updated_at = datetime.now(timezone.utc)
+                if job.attempts >= REWRITE_MAX_ATTEMPTS:
+                    finish_rewrite(job, (job.source_text or '').strip() or job.post.full_content, touched)
+                    job.status = 'failed'
+                    stats['rewrite_failed'] += 1
+                else:
+                    job.not_before = datetime.now(timezone.utc) + timedelta(seconds=REWRITE_RETRY_BASE * 2 ** job.attempts)
+                    stats['rewrite_retry'] += 1
+            if done:
+                try:
+                    with stage('db'):
+                        db.session.commit()
+                        if touched:
+                            bump_content_versions(touched)
+                except Exception as ex:
+                    db.session.rollback()
+                    print(f"[REWRITE QUEUE] commit failed: {ex}")
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+    return stats
+
+WORKER_TIME_BUDGET = float(os.environ.get('WORKER_TIME_BUDGET', 600))
+# The worker wakes often; the feed scheduler decides which feeds are actually due
+INGEST_INTERVAL = float(os.environ.get('INGEST_INTERVAL', MIN_POLL))
+# spawn: /cron starts a one-off worker process; off: a long-running worker owns the schedule
+INGEST_TRIGGER = os.environ.get('INGEST_TRIGGER', 'spawn')
+INGEST_LEASE_TTL = float(os.environ.get('INGEST_LEASE_TTL', 120))
+CLAIM_BATCH = int(os.environ.get('CLAIM_BATCH', 8))
+INGEST_HEARTBEAT = INGEST_LEASE_TTL / 4
+
+class Lease:
+    """This worker's IngestLease row. A heartbeat thread (on its own connection) keeps the row
+    and the worker's feed claims alive until release()."""
+
+    def __init__(self):
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self.phase = 'fetch'
+        self.feeds = 0
+        self.lost = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self.engine = None
+
+    def acquire(self):
+        # Kept for the heartbeat thread, which runs outside the app context
+        self.engine = db.engine
+        now = datetime.now(timezone.utc)
+        with self.engine.begin() as conn:
+            # Leases of workers that stopped heartbeating are dropped; their feed claims lapse on their own
+            conn.execute(sqlalchemy.delete(IngestLease).where(IngestLease.expires_at < now))
+            conn.execute(sqlalchemy.insert(IngestLease).values(
+                owner=self.owner, host=socket.gethostname(), pid=os.getpid(), phase=self.phase, feeds=0,
+                started_at=now, heartbeat_at=now, expires_at=now + timedelta(seconds=INGEST_LEASE_TTL)))
+        self._thread = threading.Thread(target=self._beat, name='lease-heartbeat', daemon=True)
+        self._thread.start()
+
+    def heartbeat(self):
+        now = datetime.now(timezone.utc)
+        until = now + timedelta(seconds=INGEST_LEASE_TTL)
+        with self.engine.begin() as conn:
+            alive = conn.execute(sqlalchemy.update(IngestLease).where(IngestLease.owner == self.owner).values(
+                heartbeat_at=now, expires_at=until, phase=self.phase, feeds=self.feeds)).rowcount
+            conn.execute(sqlalchemy.update(FeedState).where(FeedState.claimed_by == self.owner).values(claimed_until=until))
+        if not alive:
+            # Expired and reaped while we were stalled: someone else may own our feeds by now
+            print(f"[LEASE] {self.owner} lost its lease")
+            self.lost.set()
+
+    def _beat(self):
+        while not self._stop.wait(INGEST_HEARTBEAT):
+            try:
+                self.heartbeat()
+            except Exception as ex:
+                print(f"[LEASE] heartbeat failed: {ex}")
+
+    def release(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        with self.engine.begin() as conn:
+            conn.execute(sqlalchemy.update(FeedState).where(FeedState.claimed_by == self.owner).values(
+                claimed_by=None, claimed_until=None))
+            conn.execute(sqlalchemy.delete(IngestLease).where(IngestLease.owner == self.owner))
+
+@contextmanager
+def ingest_lease():
+    lease = Lease()
+    lease.acquire()
+    try:
+        yield lease
+    finally:
+        try:
+            lease.release()
+        except Exception as ex:
+            print(f"[LEASE] release failed, lease will expire in {INGEST_LEASE_TTL:.0f}s: {ex}")
+
+def active_leases():
+    return (IngestLease.query.filter(IngestLease.expires_at > datetime.now(timezone.utc))
+            .order_by(IngestLease.started_at).all())
+
+def ingest_once(budget=WORKER_TIME_BUDGET, feeds=None):
+    added = 0
+    skipped = 0
+    errors = []
+
+    try:
+        with app.app_context():
+            init_db()
+
+            try:
+                db.session.execute(text("SELECT 1"))
+            except Exception as db_err:
+                errors.append(f"DB ping failed: {str(db_err)}")
+                db.session.rollback()
+
+            with ingest_lease() as lease:
+                stats = run_ingest(feeds, budget=budget, lease=lease)
+            added, skipped, errors = stats['added'], stats['skipped'], errors + stats['errors']
     except Exception as main_ex:
         errors.append(str(main_ex))
         print(f"Main cron error: {str(main_ex)}")
 
+    msg = f"NaijaBuzz cron ran! Added {added} new stories. Skipped {skipped} items. Errors: {len(errors)}."
+    if errors:
+        msg += " Last error: " + errors[-1]
+        print("Cron errors:", errors)
+    return msg
+
+@app.cli.command('ingest')
+@click.option('--loop', is_flag=True, help='Keep running, one crawl every --interval seconds.')
+@click.option('--interval', default=INGEST_INTERVAL, show_default=True, help='Seconds between crawl starts.')
+@click.option('--budget', default=WORKER_TIME_BUDGET, show_default=True, help='Time budget per crawl in seconds.')
+@click.option('--all', 'all_feeds', is_flag=True, help='Poll every feed, ignoring the adaptive schedule.')
+def ingest_command(loop, interval, budget, all_feeds):
+    """Run the feed -> extract -> rewrite -> store pipeline outside the web process."""
+    while True:
+        started = time.monotonic()
+        print(f"[WORKER] {ingest_once(budget, FEEDS if all_feeds else None)}", flush=True)
+        if not loop:
+            break
+        time.sleep(max(0.0, interval - (time.monotonic() - started)))
+
+_ingest_proc = None
+_ingest_proc_lock = threading.Lock()
+
+def trigger_ingest():
+    # Start a worker process unless one is already running: ours, or any worker holding a live lease
+    global _ingest_proc
+    with _ingest_proc_lock:
+        if _ingest_proc is not None and _ingest_proc.poll() is None:
+            return f"NaijaBuzz ingestion already running (pid {_ingest_proc.pid})."
+        leases = active_leases()
+        if leases:
+            return f"NaijaBuzz ingestion already running ({leases[0].owner}, {len(leases)} worker(s))."
+        _ingest_proc = subprocess.Popen(
+            [sys.executable, '-m', 'flask', '--app', 'main', 'ingest'],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        )
+        return f"NaijaBuzz cron triggered! Ingestion running in background (pid {_ingest_proc.pid})."
+
+@app.route('/cron')
+@app.route('/generate')
+def cron():
+    if INGEST_TRIGGER == 'off':
+        return "NaijaBuzz ingestion is handled by the background worker."
+    try:
+        return trigger_ingest()
+    except Exception as ex:
+        print(f"Cron trigger error: {ex}")
+        return f"NaijaBuzz cron could not start ingestion: {str(ex)[:150]}", 500
+
+@app.route('/cron/status')
+def cron_status():
+    now = datetime.now(timezone.utc)
+    leases = IngestLease.query.order_by(IngestLease.started_at).all()
+    claimed = dict(db.session.query(FeedState.claimed_by, sqlalchemy.func.count())
+                   .filter(FeedState.claimed_by.isnot(None), FeedState.claimed_until > now)
+                   .group_by(FeedState.claimed_by).all())
+    iso = lambda dt: as_utc(dt).isoformat() if dt else None
+    resp = jsonify({
+        'active': any(as_utc(l.expires_at) > now for l in leases),
+        'trigger': INGEST_TRIGGER,
+        'lease_ttl': INGEST_LEASE_TTL,
+        'leases': [{
+            'owner': l.owner, 'host': l.host, 'pid': l.pid, 'phase': l.phase,
+            'feeds': l.feeds, 'claimed_feeds': claimed.get(l.owner, 0),
+            'started_at': iso(l.started_at), 'heartbeat_at': iso(l.heartbeat_at), 'expires_at': iso(l.expires_at),
+            'expired': as_utc(l.expires_at) <= now,
+        } for l in leases],
+        'rewrite_queue': RewriteJob.query.filter_by(status='pending').count(),
+    })
+    resp.headers['Cache-Control'] = 'no-store'
+    return resp
+
+# Request-path audit: schema work (DDL, PRAGMA, catalog reflection) must never run while
+# serving readers. Any such statement inside a request is logged and kept here.
+AUDIT_PATTERN = re.compile(
+    r'^\s*(CREATE|ALTER|DROP|TRUNCATE|PRAGMA)\b|sqlite_master|sqlite_schema|information_schema|pg_catalog',
+    re.IGNORECASE)
+REQUEST_AUDIT = deque(maxlen=100)
+
+@sqlalchemy.event.listens_for(sqlalchemy.engine.Engine, 'before_cursor_execute')
+def audit_request_sql(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context() and AUDIT_PATTERN.search(statement):
+        REQUEST_AUDIT.append((request.path, statement.strip()[:200]))
+        print(f"[AUDIT] schema statement during {request.path}: {statement.strip()[:120]}")
+
+@app.cli.command('audit')
+def audit_command():
+    """Hit the reader routes and report SQL per request, failing on any DDL or reflection."""
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    sqlalchemy.event.listen(sqlalchemy.engine.Engine, 'before_cursor_execute', listener)
+    with app.app_context():
+        post = Post.query.order_by(Post.pub_date.desc()).first()
+    paths = ['/', '/?cat=football', '/?cat=football&page=2', '/sitemap.xml', '/sitemap-posts-1.xml', '/search?q=news'] + ([f'/{post.slug}'] if post else [])
+    client = app.test_client()
+    try:
+        for path in paths:
+            statements.clear()
+            status = client.get(path).status_code
+            flagged = [st for st in statements if AUDIT_PATTERN.search(st)]
+            print(f"{path:<40} {status} {len(statements):>3} queries {len(flagged):>2} schema")
+            for st in flagged:
+                print(f"    ! {st.strip()[:120]}")
     finally:
-        msg = f"NaijaBuzz cron ran! Added {added} new stories. Skipped {skipped} items. Errors: {len(errors)}."
-        if errors:
-            msg += " Last error: " + errors[-1]
-            print("Cron errors:", errors)
-        return msg
+        sqlalchemy.event.remove(sqlalchemy.engine.Engine, 'before_cursor_execute', listener)
+    if REQUEST_AUDIT:
+        raise click.ClickException(f"{len(REQUEST_AUDIT)} schema statements ran on the request path")
+    print("OK: no DDL or metadata reflection on the request path")
+
+# Schema setup happens here, once per process, instead of inside index()
+STARTUP_TIMINGS['module'] = time.perf_counter() - _startup_started - STARTUP_TIMINGS['imports']
+if os.environ.get('INIT_DB_ON_STARTUP', '1') == '1':
+    _phase_started = time.perf_counter()
+    try:
+        init_db()
+    except Exception as startup_ex:
+        print(f"[STARTUP] init_db failed, will retry from the ingestion worker: {startup_ex}")
+    STARTUP_TIMINGS['init_db'] = time.perf_counter() - _phase_started
+STARTUP_TIMINGS['total'] = time.perf_counter() - _startup_started
+print("[STARTUP] " + ", ".join(f"{name} {seconds * 1000:.0f}ms" for name, seconds in STARTUP_TIMINGS.items()), flush=True)
 
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=int(os.environ.get('PORT', 5000)))